@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BaseConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "base"
+
+    def ready(self):
+        # Register the catalog cache invalidation signals
+        from base import signals  # noqa: F401
@@ -1,6 +1,23 @@
+from django.conf import settings
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from base.models import User as CustomUser
+from base.utils import has_shared_cache
+
+PROFILE_ID_CLAIM = "profile_id"
+
+
+def get_user_active_cache_key(user_id):
+    return f"auth:user-active:{user_id}"
 
 
 class EmailOrUsernameBackend(BaseBackend):
@@ -29,3 +46,86 @@ class EmailOrUsernameBackend(BaseBackend):
             return User.objects.get(pk=user_id)
         except User.DoesNotExist:
             return None
+
+
+def get_token_for_user(user, profile=None):
+    """
+    Create a refresh token for the auth user that also carries the custom
+    User id, username and active flag, so requests made with its access
+    tokens can be authenticated without any query
+    """
+    refresh = RefreshToken.for_user(user)
+
+    if profile is None:
+        profile = CustomUser.objects.filter(auth_user=user).first()
+    if profile is not None:
+        refresh[PROFILE_ID_CLAIM] = profile.id
+
+    refresh["username"] = user.username
+    refresh["is_active"] = user.is_active
+    return refresh
+
+
+class ProfileTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token obtain serializer issuing tokens with the profile claims
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        return get_token_for_user(user)
+
+
+class ProfileTokenUser(TokenUser):
+    """
+    Lightweight request user built from the access token claims alone
+    """
+
+    @cached_property
+    def profile_id(self):
+        return self.token[PROFILE_ID_CLAIM]
+
+    @cached_property
+    def is_active(self):
+        return self.token.get("is_active", True)
+
+
+class ProfileJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds the request user from the token claims
+    instead of loading it from the database. Tokens issued before the profile
+    claims existed fall back to the regular database lookup.
+
+    Whether the auth user still exists and is active is checked against the
+    database and cached for JWT_REVOCATION_CHECK_TTL seconds, so deactivated
+    or deleted users lose access within that time even with a valid token.
+    The check is only cached in a cache shared by every worker, since a
+    per-process cache can't be invalidated when a user is deactivated.
+    """
+
+    def get_user(self, validated_token):
+        if PROFILE_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        user = ProfileTokenUser(validated_token)
+
+        if not user.is_active or not self.is_user_active(user.id):
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        return user
+
+    def is_user_active(self, user_id):
+        """Check that the auth user is still active, if revocation checks are enabled"""
+        ttl = settings.JWT_REVOCATION_CHECK_TTL
+        if not ttl:
+            return True
+
+        if not has_shared_cache():
+            return User.objects.filter(pk=user_id, is_active=True).exists()
+
+        cache_key = get_user_active_cache_key(user_id)
+        is_active = cache.get(cache_key)
+        if is_active is None:
+            is_active = User.objects.filter(pk=user_id, is_active=True).exists()
+            cache.set(cache_key, is_active, ttl)
+        return is_active
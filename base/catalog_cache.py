@@ -0,0 +1,129 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from base.conditional import ConditionalGetMixin, make_etag
+from base.models import ProductCategory
+from base.utils import has_shared_cache
+
+CATALOG_VERSION_KEY = "catalog:version"
+PRODUCT_CATEGORIES_VERSION_KEY = "catalog:product-categories:version"
+
+
+def get_shop_version_key(shop_id):
+    return f"catalog:shop:{shop_id}:version"
+
+
+def get_catalog_version(version_key):
+    """
+    Current version stored under version_key. Versions start from the
+    current time in nanoseconds, so a version lost to eviction or a restart
+    never comes back as an old value with stale entries behind it
+    """
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, time.time_ns(), timeout=None)
+        version = cache.get(version_key, time.time_ns())
+    return version
+
+
+def bump_catalog_version(version_key):
+    """Move version_key to a new version, orphaning every entry cached under it"""
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, time.time_ns(), timeout=None)
+
+
+def bump_shop_version(shop_id, shop_list=False):
+    """
+    Invalidate the cached detail and products of a shop. Set shop_list when
+    the shop itself changed, to also invalidate the cached shop lists
+    """
+    bump_catalog_version(get_shop_version_key(shop_id))
+    if shop_list:
+        bump_catalog_version(CATALOG_VERSION_KEY)
+
+
+def bump_product_categories_version():
+    """Invalidate the cached list of product categories in use"""
+    bump_catalog_version(PRODUCT_CATEGORIES_VERSION_KEY)
+
+
+def get_product_categories():
+    """
+    Names of the product categories in use by any shop, read from the
+    category registry and cached until a shop's categories change
+    """
+    categories = ProductCategory.objects.order_by("name").values_list("name", flat=True)
+    if not has_shared_cache():
+        return list(categories.distinct())
+
+    version = get_catalog_version(PRODUCT_CATEGORIES_VERSION_KEY)
+    cache_key = f"catalog:product-categories:{version}"
+    cached = cache.get(cache_key)
+    if cached is None:
+        cached = list(categories.distinct())
+        cache.set(cache_key, cached, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    return cached
+
+
+class CatalogCacheMixin(ConditionalGetMixin):
+    """
+    Caches the rendered bytes of successful GET responses of catalog views,
+    so hits skip both the ORM and the serializer. Entries are keyed by the
+    full path and the version from get_catalog_version_key(); bumping that
+    version invalidates them. The same version makes the ETag, so clients
+    polling an unchanged catalog get a 304. Authentication and permissions
+    still run on every request.
+
+    Without a cache shared by every worker, the versions can't be bumped
+    for the other workers, so responses are neither cached nor given an ETag.
+    """
+
+    catalog_cache_key = None
+
+    def get(self, request, *args, **kwargs):
+        if not has_shared_cache():
+            return super(ConditionalGetMixin, self).get(request, *args, **kwargs)
+        return super().get(request, *args, **kwargs)
+
+    def get_catalog_version_key(self):
+        raise NotImplementedError
+
+    def get_conditional_state(self):
+        version = get_catalog_version(self.get_catalog_version_key())
+        path = self.request.get_full_path()
+        path_hash = hashlib.sha256(path.encode("utf-8")).hexdigest()
+        self.catalog_cache_key = f"catalog:response:{version}:{path_hash}"
+        return make_etag("catalog", version, path), None
+
+    def get_full_response(self, request, *args, **kwargs):
+        cached = cache.get(self.catalog_cache_key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        return super().get_full_response(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if (
+            self.catalog_cache_key
+            and isinstance(response, Response)
+            and response.status_code == status.HTTP_200_OK
+        ):
+            response.render()
+            cache.set(
+                self.catalog_cache_key,
+                (response.content, response["Content-Type"]),
+                timeout=settings.CATALOG_CACHE_TIMEOUT,
+            )
+
+        return response
@@ -0,0 +1,49 @@
+import hashlib
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Build a quoted strong ETag from the given parts"""
+    payload = ":".join(str(part) for part in parts)
+    return quote_etag(hashlib.sha256(payload.encode("utf-8")).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET requests whose If-None-Match matches the current ETag with a
+    304 before the view fetches or serializes anything. Views implement
+    get_conditional_state() with a cheap lookup of what the ETag and
+    Last-Modified are derived from.
+    """
+
+    def get_conditional_state(self):
+        """
+        Return (etag, last_modified), last_modified being a datetime or None.
+        May raise ObjectDoesNotExist, the view then handles the request as usual
+        """
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        try:
+            etag, last_modified = self.get_conditional_state()
+        except ObjectDoesNotExist:
+            return super().get(request, *args, **kwargs)
+
+        # Only the ETag decides, Last-Modified has a one second resolution
+        # and would hide changes made within the same second
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.get_full_response(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
+
+    def get_full_response(self, request, *args, **kwargs):
+        """Build the response of a request that isn't answered with a 304"""
+        return super().get(request, *args, **kwargs)
@@ -0,0 +1,143 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from base.models import IdempotencyKey
+from base.utils import get_user_from_user_auth
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def get_request_fingerprint(request):
+    """Hash the method, path and body of a request"""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    payload = f"{request.method}\n{request.path}\n{body}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def claim_idempotency_key(user, key, fingerprint):
+    """
+    Insert the key if it is absent. Returns (record, created); when created is
+    False the record belongs to an earlier request with the same key.
+    Expired records, and pending records whose request died before storing a
+    response, are deleted and the key is claimed again.
+    """
+    now = timezone.now()
+    expired_before = now - settings.IDEMPOTENCY_KEY_TTL
+    abandoned_before = now - settings.IDEMPOTENCY_KEY_PENDING_TIMEOUT
+
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user, key=key, request_fingerprint=fingerprint
+                )
+            return record, True
+        except IntegrityError:
+            pass
+
+        try:
+            record = IdempotencyKey.objects.get(user=user, key=key)
+        except IdempotencyKey.DoesNotExist:
+            # Released by the earlier request in the meantime, claim it again
+            continue
+
+        if record.created_at < expired_before:
+            IdempotencyKey.objects.filter(
+                pk=record.pk, created_at__lt=expired_before
+            ).delete()
+        elif record.status_code is None and record.created_at < abandoned_before:
+            IdempotencyKey.objects.filter(
+                pk=record.pk, status_code__isnull=True, created_at__lt=abandoned_before
+            ).delete()
+        else:
+            return record, False
+
+    raise IntegrityError(f"Could not claim {IDEMPOTENCY_KEY_HEADER} {key}")
+
+
+class IdempotentCreateMixin:
+    """
+    Lets clients safely retry a POST by sending an Idempotency-Key header.
+    The first request with a key runs normally and its successful response
+    is stored; retries with the same key replay that response without
+    running the write again. Requests without the header are unaffected.
+    """
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not key:
+            return super().post(request, *args, **kwargs)
+
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {
+                    "success": False,
+                    "error": f"{IDEMPOTENCY_KEY_HEADER} must be at most "
+                    f"{IDEMPOTENCY_KEY_MAX_LENGTH} characters",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user = get_user_from_user_auth(request)
+        fingerprint = get_request_fingerprint(request)
+        record, created = claim_idempotency_key(user, key, fingerprint)
+
+        if not created:
+            return self.replay_idempotent_response(record, fingerprint)
+
+        try:
+            # Store the response in the same transaction as the write, so the
+            # key is never left pending after a committed write. If the key
+            # was reclaimed as abandoned meanwhile, the save affects no rows
+            # and raises, rolling the write back
+            with transaction.atomic():
+                response = super().post(request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    record.status_code = response.status_code
+                    record.response_body = response.data
+                    record.save(update_fields=["status_code", "response_body"])
+        except Exception:
+            # Release the key so the client can retry
+            record.delete()
+            raise
+
+        if not status.is_success(response.status_code):
+            # Failed requests didn't write anything, so retries may run again
+            record.delete()
+
+        return response
+
+    def replay_idempotent_response(self, record, fingerprint):
+        """Return the stored response of an earlier request with the same key"""
+        if record.request_fingerprint != fingerprint:
+            return Response(
+                {
+                    "success": False,
+                    "error": f"{IDEMPOTENCY_KEY_HEADER} was already used "
+                    "with a different request",
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+        if record.status_code is None:
+            return Response(
+                {
+                    "success": False,
+                    "error": f"A request with this {IDEMPOTENCY_KEY_HEADER} "
+                    "is still being processed",
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return Response(
+            record.response_body,
+            status=record.status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
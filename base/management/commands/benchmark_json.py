@@ -0,0 +1,100 @@
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from base.models import GroupOrder
+from base.orders_serializers import OrderDetailsSerializer
+from base.renderers import FastJSONRenderer, orjson
+
+# Values orjson encodes differently from the stdlib, which FastJSONRenderer
+# must hand over to the stdlib renderer. One per payload, so no value can
+# hide another by forcing the fallback
+EDGE_CASE_PAYLOADS = [
+    {"large": 1e16},
+    {"negative_large": -1.5e300},
+    {"small": 1e-7},
+    {"small_decimal": 5e-5},
+    {"negative_small_decimal": -2.5e-5},
+    {"smallest_plain": 1e-4},
+    {"nan": float("nan")},
+    {"infinity": float("inf")},
+    {"negative_infinity": float("-inf")},
+    {"big_int": 123456789012345678901234567890},
+    {"separators": "\u2028\u2029"},
+    {"missing": None},
+]
+
+
+def render_outcome(renderer, data):
+    """The rendered bytes, or the type of the error rendering raised"""
+    try:
+        return renderer.render(data)
+    except ValueError as exc:
+        return type(exc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer with FastJSONRenderer on real "
+        "OrderDetailsSerializer output"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--orders", type=int, default=20, help="Orders per payload (default 20)"
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=1000,
+            help="Renders per renderer (default 1000)",
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError(
+                "orjson is not installed, FastJSONRenderer uses the stdlib encoder"
+            )
+
+        orders = GroupOrder.objects.select_related("created_by", "shop").order_by(
+            "-created_at"
+        )[: options["orders"]]
+        data = OrderDetailsSerializer(orders, many=True).data
+        if not data:
+            raise CommandError("No orders to serialize, create some orders first")
+
+        stdlib_renderer = JSONRenderer()
+        fast_renderer = FastJSONRenderer()
+        stdlib_output = stdlib_renderer.render(data)
+        fast_output = fast_renderer.render(data)
+        if stdlib_output != fast_output:
+            raise CommandError("FastJSONRenderer output differs from JSONRenderer")
+
+        for payload in EDGE_CASE_PAYLOADS:
+            if render_outcome(stdlib_renderer, payload) != render_outcome(
+                fast_renderer, payload
+            ):
+                raise CommandError(
+                    f"FastJSONRenderer output differs from JSONRenderer for {payload}"
+                )
+
+        iterations = options["iterations"]
+        stdlib_time = timeit.timeit(
+            lambda: stdlib_renderer.render(data), number=iterations
+        )
+        fast_time = timeit.timeit(lambda: fast_renderer.render(data), number=iterations)
+
+        self.stdout.write(
+            f"{len(data)} orders, {len(stdlib_output)} bytes, identical output "
+            f"(and for {len(EDGE_CASE_PAYLOADS)} edge case payloads)"
+        )
+        self.stdout.write(
+            f"JSONRenderer:     {stdlib_time / iterations * 1e6:.1f} us per render"
+        )
+        self.stdout.write(
+            f"FastJSONRenderer: {fast_time / iterations * 1e6:.1f} us per render"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Speedup: {stdlib_time / fast_time:.1f}x")
+        )
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from base.models import GroupOrder, GroupOrderItem, GroupOrderParticipant, Product
+
+
+def get_hot_queries():
+    """The hot queries, each paired with the index it should use"""
+    return [
+        (
+            "Participant of an order",
+            GroupOrderParticipant.objects.filter(group_order_id=1, user_id=1),
+            "unique_participant_per_order",
+        ),
+        (
+            "Orders a user participates in",
+            GroupOrderParticipant.objects.filter(user_id=1).values("group_order_id"),
+            "participant_user_order_idx",
+        ),
+        (
+            "Items of a user in an order",
+            GroupOrderItem.objects.filter(group_order_id=1, user_id=1),
+            "unique_order_item_per_user_product",
+        ),
+        (
+            "Orders created by a user, newest first",
+            GroupOrder.objects.filter(created_by_id=1).order_by("-created_at"),
+            "grouporder_creator_created_idx",
+        ),
+        (
+            "Orders by status, oldest first",
+            GroupOrder.objects.filter(status="open").order_by("created_at"),
+            "grouporder_status_created_idx",
+        ),
+        (
+            "Products of a shop in a category",
+            Product.objects.filter(shop_id=1, category="Drinks"),
+            "product_shop_category_idx",
+        ),
+    ]
+
+
+def uses_index(plan, queryset, index_name):
+    """Whether the query plan uses the named index"""
+    if index_name in plan:
+        return True
+    # SQLite names the indexes of inline unique constraints after the table
+    table = queryset.model._meta.db_table
+    return connection.vendor == "sqlite" and f"sqlite_autoindex_{table}_" in plan
+
+
+class Command(BaseCommand):
+    help = "Print the query plans of the hot queries and check they use their indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with an error if any query doesn't use its index",
+        )
+
+    def handle(self, *args, **options):
+        missing = []
+
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Small tables are cheaper to scan sequentially, so disable
+                # sequential scans to see which index the planner would pick
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for label, queryset, index_name in get_hot_queries():
+                plan = queryset.explain()
+                if uses_index(plan, queryset, index_name):
+                    style = self.style.SUCCESS
+                else:
+                    style = self.style.ERROR
+                    missing.append(label)
+
+                self.stdout.write(style(f"{label} (expects {index_name})"))
+                self.stdout.write(plan)
+                self.stdout.write("")
+
+        if missing and options["check"]:
+            raise CommandError(f"Queries not using their index: {', '.join(missing)}")
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from base.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL"
+
+    def handle(self, *args, **options):
+        expired_before = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+        deleted, _ = IdempotencyKey.objects.filter(
+            created_at__lt=expired_before
+        ).delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys")
+        )
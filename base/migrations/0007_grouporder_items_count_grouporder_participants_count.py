@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_order_counters(apps, schema_editor):
+    GroupOrder = apps.get_model("base", "GroupOrder")
+    GroupOrderItem = apps.get_model("base", "GroupOrderItem")
+    GroupOrderParticipant = apps.get_model("base", "GroupOrderParticipant")
+
+    def count_for_order(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(group_order=OuterRef("pk"))
+                .order_by()
+                .values("group_order")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+
+    GroupOrder.objects.update(
+        items_count=count_for_order(GroupOrderItem),
+        participants_count=count_for_order(GroupOrderParticipant),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("base", "0006_merge_0005_grouporder_code_0005_product_category"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="grouporder",
+            name="items_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="grouporder",
+            name="participants_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_order_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:20
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min, Sum
+
+import base.operations
+
+
+def merge_duplicate_order_items(apps, schema_editor):
+    GroupOrder = apps.get_model("base", "GroupOrder")
+    GroupOrderItem = apps.get_model("base", "GroupOrderItem")
+
+    duplicates = (
+        GroupOrderItem.objects.filter(product__isnull=False, user__isnull=False)
+        .values("group_order", "user", "product")
+        .annotate(
+            item_count=Count("id"),
+            keep_id=Min("id"),
+            total_quantity=Sum("quantity"),
+            total_price=Sum("price"),
+        )
+        .filter(item_count__gt=1)
+        .order_by()
+    )
+
+    for duplicate in list(duplicates):
+        # Merge all rows into the oldest one, the totals stay the same
+        GroupOrderItem.objects.filter(pk=duplicate["keep_id"]).update(
+            quantity=duplicate["total_quantity"], price=duplicate["total_price"]
+        )
+        GroupOrderItem.objects.filter(
+            group_order=duplicate["group_order"],
+            user=duplicate["user"],
+            product=duplicate["product"],
+        ).exclude(pk=duplicate["keep_id"]).delete()
+        GroupOrder.objects.filter(pk=duplicate["group_order"]).update(
+            items_count=F("items_count") - (duplicate["item_count"] - 1)
+        )
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("base", "0008_idempotencykey"),
+    ]
+
+    operations = [
+        # The merge still runs in its own transaction
+        migrations.RunPython(
+            merge_duplicate_order_items, migrations.RunPython.noop, atomic=True
+        ),
+        base.operations.AddUniqueConstraintConcurrently(
+            model_name="grouporderitem",
+            constraint=models.UniqueConstraint(
+                fields=("group_order", "user", "product"),
+                name="unique_order_item_per_user_product",
+            ),
+        ),
+    ]
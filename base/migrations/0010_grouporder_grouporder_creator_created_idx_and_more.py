@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:25
+
+from django.db import migrations, models
+
+import base.operations
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("base", "0009_grouporderitem_unique_order_item_per_user_product"),
+    ]
+
+    operations = [
+        base.operations.AddIndexConcurrently(
+            model_name="grouporder",
+            index=models.Index(
+                fields=["created_by", "-created_at"],
+                name="grouporder_creator_created_idx",
+            ),
+        ),
+        base.operations.AddIndexConcurrently(
+            model_name="grouporderparticipant",
+            index=models.Index(
+                fields=["user", "group_order"], name="participant_user_order_idx"
+            ),
+        ),
+    ]
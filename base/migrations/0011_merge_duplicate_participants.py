@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:40
+
+from django.db import migrations
+from django.db.models import Count, F, Min, Sum
+
+
+def merge_duplicate_participants(apps, schema_editor):
+    GroupOrder = apps.get_model("base", "GroupOrder")
+    GroupOrderParticipant = apps.get_model("base", "GroupOrderParticipant")
+
+    duplicates = (
+        GroupOrderParticipant.objects.values("group_order", "user")
+        .annotate(
+            participant_count=Count("id"),
+            keep_id=Min("id"),
+            total_amount=Sum("amount"),
+            total_paid_amount=Sum("paid_amount"),
+        )
+        .filter(participant_count__gt=1)
+        .order_by()
+    )
+
+    for duplicate in list(duplicates):
+        # Merge all rows into the oldest one, the order total stays the same
+        GroupOrderParticipant.objects.filter(pk=duplicate["keep_id"]).update(
+            amount=duplicate["total_amount"],
+            paid_amount=duplicate["total_paid_amount"],
+        )
+        GroupOrderParticipant.objects.filter(
+            group_order=duplicate["group_order"], user=duplicate["user"]
+        ).exclude(pk=duplicate["keep_id"]).delete()
+        GroupOrder.objects.filter(pk=duplicate["group_order"]).update(
+            participants_count=F("participants_count")
+            - (duplicate["participant_count"] - 1)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("base", "0010_grouporder_grouporder_creator_created_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_participants, migrations.RunPython.noop),
+    ]
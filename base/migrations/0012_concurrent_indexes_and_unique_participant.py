@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:40
+
+from django.db import migrations, models
+
+import base.operations
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("base", "0011_merge_duplicate_participants"),
+    ]
+
+    operations = [
+        base.operations.AddIndexConcurrently(
+            model_name="grouporder",
+            index=models.Index(
+                fields=["status", "created_at"], name="grouporder_status_created_idx"
+            ),
+        ),
+        base.operations.AddIndexConcurrently(
+            model_name="product",
+            index=models.Index(
+                fields=["shop", "category"], name="product_shop_category_idx"
+            ),
+        ),
+        base.operations.AddUniqueConstraintConcurrently(
+            model_name="grouporderparticipant",
+            constraint=models.UniqueConstraint(
+                fields=("group_order", "user"), name="unique_participant_per_order"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:05
+
+from django.db import migrations
+
+import base.operations
+
+# icontains compiles to UPPER(column::text) LIKE UPPER(...) on PostgreSQL,
+# so the trigram indexes are built on that same expression
+TRIGRAM_INDEXES = [
+    ("shop_name_trgm_idx", "base_shop", "name"),
+    ("shop_description_trgm_idx", "base_shop", "description"),
+    ("product_name_trgm_idx", "base_product", "name"),
+]
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("base", "0012_concurrent_indexes_and_unique_participant"),
+    ]
+
+    operations = [
+        base.operations.RunPostgreSQL(
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ] + [
+        base.operations.RunPostgreSQL(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)',
+            reverse_sql=f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+        )
+        for name, table, column in TRIGRAM_INDEXES
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("base", "0013_search_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="grouporder",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
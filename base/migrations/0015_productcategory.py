@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_product_categories(apps, schema_editor):
+    Product = apps.get_model("base", "Product")
+    ProductCategory = apps.get_model("base", "ProductCategory")
+
+    categories = (
+        Product.objects.exclude(category__isnull=True)
+        .exclude(category__exact="")
+        .values_list("shop_id", "category")
+        .distinct()
+    )
+    ProductCategory.objects.bulk_create(
+        [ProductCategory(shop_id=shop_id, name=name) for shop_id, name in categories],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("base", "0014_grouporder_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductCategory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50)),
+                (
+                    "shop",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="product_categories",
+                        to="base.shop",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["name"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("shop", "name"), name="unique_product_category_per_shop"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_product_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:10
+
+from django.db import migrations, models
+
+import base.operations
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("base", "0015_productcategory"),
+    ]
+
+    operations = [
+        base.operations.AddIndexConcurrently(
+            model_name="grouporder",
+            index=models.Index(
+                fields=["updated_at", "id"], name="grouporder_updated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:15
+
+from django.db import migrations
+
+import base.operations
+
+# Arabic letter variants folded and diacritics and tatweel stripped by
+# base.search.SearchFold, which compiles to TRANSLATE() on PostgreSQL
+ARABIC_DECORATIONS = "".join(
+    chr(code)
+    for start, end in [(0x610, 0x61A), (0x640, 0x640), (0x64B, 0x65F), (0x670, 0x670)]
+    + [(0x6D6, 0x6ED)]
+    for code in range(start, end + 1)
+)
+FOLD_SOURCE = "أإآىة" + ARABIC_DECORATIONS
+FOLD_TARGET = "ااايه"
+
+# Searches filter on UPPER(TRANSLATE(column, ...)::text) LIKE UPPER(...),
+# so the trigram indexes are rebuilt on that expression. Product categories
+# had no trigram index before
+NEW_TRIGRAM_INDEXES = [
+    ("product_category_fold_trgm_idx", "base_product", "category"),
+]
+TRIGRAM_INDEXES = [
+    ("shop_name_trgm_idx", "shop_name_fold_trgm_idx", "base_shop", "name"),
+    (
+        "shop_description_trgm_idx",
+        "shop_description_fold_trgm_idx",
+        "base_shop",
+        "description",
+    ),
+    ("product_name_trgm_idx", "product_name_fold_trgm_idx", "base_product", "name"),
+]
+
+
+def create_index_sql(name, table, expression):
+    return (
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" '
+        f"USING gin ((UPPER({expression}::text)) gin_trgm_ops)"
+    )
+
+
+def drop_index_sql(name):
+    return f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'
+
+
+def fold_expression(column):
+    return f"TRANSLATE(\"{column}\", '{FOLD_SOURCE}', '{FOLD_TARGET}')"
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("base", "0016_grouporder_updated_idx"),
+    ]
+
+    operations = [
+        operation
+        for old_name, new_name, table, column in TRIGRAM_INDEXES
+        for operation in [
+            base.operations.RunPostgreSQL(
+                create_index_sql(new_name, table, fold_expression(column)),
+                reverse_sql=drop_index_sql(new_name),
+            ),
+            base.operations.RunPostgreSQL(
+                drop_index_sql(old_name),
+                reverse_sql=create_index_sql(old_name, table, f'"{column}"'),
+            ),
+        ]
+    ] + [
+        base.operations.RunPostgreSQL(
+            create_index_sql(name, table, fold_expression(column)),
+            reverse_sql=drop_index_sql(name),
+        )
+        for name, table, column in NEW_TRIGRAM_INDEXES
+    ]
@@ -68,6 +68,27 @@ class Shop(models.Model):
         return self.name
 
 
+class GroupOrderQuerySet(models.QuerySet):
+    def accessible_to(self, user):
+        """
+        Orders the user created or participates in. Uses a UNION of two
+        index-backed scans instead of an OR over a join plus DISTINCT
+        """
+        created = GroupOrder.objects.filter(created_by=user).values("pk")
+        participated = GroupOrderParticipant.objects.filter(user=user).values(
+            "group_order_id"
+        )
+        return self.filter(pk__in=created.union(participated))
+
+    def participated_by(self, user):
+        """Orders the user participates in, without a join plus DISTINCT"""
+        return self.filter(
+            pk__in=GroupOrderParticipant.objects.filter(user=user).values(
+                "group_order_id"
+            )
+        )
+
+
 class GroupOrder(models.Model):
     """
     Represents a group order
@@ -96,6 +117,25 @@ class GroupOrder(models.Model):
         blank=True,
     )
     code = models.CharField(max_length=6, unique=True, null=True, blank=True)
+    # Denormalized counters, maintained by the order write paths
+    items_count = models.PositiveIntegerField(default=0)
+    participants_count = models.PositiveIntegerField(default=0)
+    # Bumped by every write to the order, its items or its participants
+    version = models.PositiveIntegerField(default=1)
+
+    objects = GroupOrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_by", "-created_at"],
+                name="grouporder_creator_created_idx",
+            ),
+            models.Index(
+                fields=["status", "created_at"], name="grouporder_status_created_idx"
+            ),
+            models.Index(fields=["updated_at", "id"], name="grouporder_updated_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -115,6 +155,40 @@ class Product(models.Model):
 
     class Meta:
         unique_together = ("shop", "name")
+        indexes = [
+            models.Index(fields=["shop", "category"], name="product_shop_category_idx")
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded category, so saves can tell whether it changed
+        if "shop_id" in field_names and "category" in field_names:
+            instance.loaded_category = (instance.shop_id, instance.category)
+        return instance
+
+
+class ProductCategory(models.Model):
+    """
+    Represents a product category in use by a shop, kept in sync with the
+    shop's products so category lists don't scan the products
+    """
+
+    shop = models.ForeignKey(
+        Shop, on_delete=models.CASCADE, related_name="product_categories"
+    )
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["shop", "name"], name="unique_product_category_per_shop"
+            )
+        ]
+
+    def __str__(self):
+        return self.name
 
 
 class GroupOrderItem(models.Model):
@@ -134,6 +208,14 @@ class GroupOrderItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     price = models.FloatField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["group_order", "user", "product"],
+                name="unique_order_item_per_user_product",
+            )
+        ]
+
     def __str__(self):
         return f"{self.name} (x{self.quantity}) - {self.price}"
 
@@ -161,6 +243,18 @@ class GroupOrderParticipant(models.Model):
         upload_to="payment_transactions/", blank=True, null=True
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["group_order", "user"], name="unique_participant_per_order"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "group_order"], name="participant_user_order_idx"
+            )
+        ]
+
     @property
     def is_paid(self):
         return self.paid_amount == self.amount
@@ -185,3 +279,30 @@ class UserBalance(models.Model):
 
     def __str__(self):
         return f"User {self.user_id} - Balance: {self.balance}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Represents a request made with an Idempotency-Key header, storing its
+    response so client retries can be replayed instead of re-executed
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    # Null while the original request is still being processed
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key_per_user"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code})"
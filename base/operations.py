@@ -0,0 +1,85 @@
+from django.db import migrations
+
+
+class RunPostgreSQL(migrations.RunSQL):
+    """
+    RunSQL that only runs on PostgreSQL, for features Django doesn't model
+    such as extensions and operator-class indexes. Other databases skip it.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    AddIndex that builds the index with CREATE INDEX CONCURRENTLY on
+    PostgreSQL, so writes to the table aren't blocked while it's built.
+    Other databases fall back to a plain AddIndex. Migrations using it must
+    set atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+    def describe(self):
+        return f"{super().describe()} concurrently"
+
+
+class AddUniqueConstraintConcurrently(migrations.AddConstraint):
+    """
+    AddConstraint for a plain UniqueConstraint that, on PostgreSQL, builds
+    the unique index concurrently and then attaches it to the table with
+    ADD CONSTRAINT ... USING INDEX, which only takes a brief lock.
+    Other databases fall back to a plain AddConstraint. Migrations using it
+    must set atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        quote_name = schema_editor.quote_name
+        table = quote_name(model._meta.db_table)
+        name = quote_name(self.constraint.name)
+        columns = ", ".join(
+            quote_name(model._meta.get_field(field_name).column)
+            for field_name in self.constraint.fields
+        )
+        schema_editor.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({columns})"
+        )
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}"
+        )
+
+    def describe(self):
+        return f"{super().describe()} concurrently"
@@ -0,0 +1,140 @@
+import csv
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from base.models import GroupOrderItem, GroupOrderParticipant
+from base.renderers import FastJSONRenderer
+
+# Rows fetched per server-side cursor round trip
+EXPORT_CHUNK_SIZE = 500
+
+ORDER_EXPORT_FIELDS = [
+    "order_id",
+    "order_name",
+    "order_code",
+    "status",
+    "shop_name",
+    "created_at",
+    "order_total_price",
+    "amount",
+    "paid_amount",
+    "delivery_fees",
+    "vat",
+    "discount",
+    "payment_method",
+]
+
+ITEM_EXPORT_FIELDS = ["product_id", "product_name", "quantity", "price"]
+
+# Formats created_at the same way the order serializers do
+datetime_field = serializers.DateTimeField()
+
+# Leading characters that make spreadsheets treat a cell as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@")
+
+
+def get_export_participants(user, status=None):
+    """
+    The user's participant rows with their orders and the user's own items.
+    Meant to be consumed with iterator(chunk_size=...), which prefetches the
+    items one chunk at a time
+    """
+    participants = (
+        GroupOrderParticipant.objects.filter(user=user)
+        .select_related("group_order__shop")
+        .prefetch_related(
+            Prefetch(
+                "group_order__items",
+                queryset=GroupOrderItem.objects.filter(user=user)
+                .select_related("product")
+                .order_by("id"),
+                to_attr="user_items",
+            )
+        )
+        .order_by("group_order_id")
+    )
+    if status:
+        participants = participants.filter(group_order__status=status)
+    return participants
+
+
+def get_order_export_row(participant):
+    order = participant.group_order
+    return {
+        "order_id": order.id,
+        "order_name": order.name,
+        "order_code": order.code,
+        "status": order.status,
+        "shop_name": order.shop.name if order.shop else None,
+        "created_at": datetime_field.to_representation(order.created_at),
+        "order_total_price": order.total_price,
+        "amount": participant.amount,
+        "paid_amount": participant.paid_amount,
+        "delivery_fees": participant.delivery_fees,
+        "vat": participant.vat,
+        "discount": participant.discount,
+        "payment_method": participant.payment_method,
+    }
+
+
+def get_item_export_row(item):
+    return {
+        "product_id": item.product_id,
+        "product_name": item.product.name if item.product else None,
+        "quantity": item.quantity,
+        "price": item.price,
+    }
+
+
+def escape_csv_row(row):
+    """
+    Prefix text that spreadsheets would run as a formula, since order and
+    product names come from other users
+    """
+    return {
+        key: (
+            f"'{value}"
+            if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES)
+            else value
+        )
+        for key, value in row.items()
+    }
+
+
+class Echo:
+    """File-like object that returns what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_orders_csv(participants):
+    """
+    Yield CSV lines, one per item of the user in each order. Orders without
+    items of the user get a single line with empty item columns
+    """
+    writer = csv.DictWriter(Echo(), fieldnames=ORDER_EXPORT_FIELDS + ITEM_EXPORT_FIELDS)
+    yield writer.writerow(dict(zip(writer.fieldnames, writer.fieldnames)))
+
+    for participant in participants.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        order_row = get_order_export_row(participant)
+
+        items = participant.group_order.user_items
+        if not items:
+            yield writer.writerow(escape_csv_row(order_row))
+        for item in items:
+            row = {**order_row, **get_item_export_row(item)}
+            yield writer.writerow(escape_csv_row(row))
+
+
+def stream_orders_jsonl(participants):
+    """Yield JSON Lines, one order per line with the user's items nested"""
+    renderer = FastJSONRenderer()
+
+    for participant in participants.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = get_order_export_row(participant)
+        row["items"] = [
+            get_item_export_row(item) for item in participant.group_order.user_items
+        ]
+        yield renderer.render(row) + b"\n"
@@ -8,8 +8,11 @@ from base.models import (
     Shop,
 )
 from base.enums import GroupOrderStatusEnum
-from base.utils import get_user_from_user_auth, generate_unique_order_code
-from django.db import models
+from base.orders_services import add_participant, apply_amount_change
+from base.sparse_fieldsets import SparseFieldsetsMixin
+from base.utils import get_user_from_user_auth, allocate_order_code
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 
 
 class OrderItemCreateSerializer(serializers.Serializer):
@@ -21,6 +24,19 @@ class OrderItemCreateSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(min_value=1)
 
 
+def merge_item_quantities(items_data):
+    """
+    Merge validated items by product, so the same product listed twice ends up
+    in a single order item. Returns {product_id: (product, quantity)}
+    """
+    quantities = {}
+    for item_data in items_data:
+        product = item_data["product"]
+        _, quantity = quantities.get(product.id, (product, 0))
+        quantities[product.id] = (product, quantity + item_data["quantity"])
+    return quantities
+
+
 class JoinOrderSerializer(serializers.Serializer):
     """
     Serializer for joining an existing order using order code
@@ -60,17 +76,17 @@ class JoinOrderSerializer(serializers.Serializer):
         """Add user as participant to the order"""
         code = validated_data["code"]
         user = get_user_from_user_auth(self.context["request"])
-        order = GroupOrder.objects.get(code=code)
+        order = GroupOrder.objects.select_related("created_by", "shop").get(code=code)
 
         # Create participant entry with zero initial amount
-        participant = GroupOrderParticipant.objects.create(
-            group_order=order,
-            user=user,
-            amount=0.0,
-            delivery_fees=0.0,
-            vat=0.0,
-            discount=0.0,
-        )
+        try:
+            with transaction.atomic():
+                participant = add_participant(order, user)
+        except IntegrityError:
+            # A concurrent request joined the same user first
+            raise serializers.ValidationError(
+                "You are already a participant in this order"
+            )
 
         return {
             "order": order,
@@ -92,14 +108,20 @@ class AddItemsToOrderSerializer(serializers.Serializer):
             raise serializers.ValidationError("At least one item is required")
 
         order = self.context["order"]
-        product_ids = [item["product_id"] for item in value]
-        products = Product.objects.filter(id__in=product_ids, shop=order.shop)
+        product_ids = {item["product_id"] for item in value}
+        products = {
+            p.id: p for p in Product.objects.filter(id__in=product_ids, shop=order.shop)
+        }
 
         if len(products) != len(product_ids):
             raise serializers.ValidationError(
                 "One or more products not found or don't belong to this shop"
             )
 
+        # Keep the loaded products so create() doesn't query them again
+        for item in value:
+            item["product"] = products[item["product_id"]]
+
         return value
 
     def validate(self, attrs):
@@ -110,58 +132,247 @@ class AddItemsToOrderSerializer(serializers.Serializer):
         return attrs
 
     def create(self, validated_data):
-        """Add items to the existing order"""
+        """Add items to the existing order, merging them into existing items"""
         order = self.context["order"]
         user = get_user_from_user_auth(self.context["request"])
-        items_data = validated_data["items"]
-
-        # Get products
-        product_ids = [item["product_id"] for item in items_data]
-        products = {p.id: p for p in Product.objects.filter(id__in=product_ids)}
+        quantities = merge_item_quantities(validated_data["items"])
+
+        # A concurrent request may insert the same new product first, in that
+        # case retry once so the product is incremented instead
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    return self.add_items(order, user, quantities)
+            except IntegrityError:
+                if attempt:
+                    raise
+
+    def add_items(self, order, user, quantities):
+        """Increment the user's existing items and insert the remaining ones"""
+        # Lock the user's existing items for these products
+        existing_items = {
+            item.product_id: item
+            for item in GroupOrderItem.objects.select_for_update().filter(
+                group_order=order, user=user, product_id__in=quantities
+            )
+        }
 
         # Calculate user's additional amount
         user_additional_amount = 0
+        updated_items = []
         new_items = []
 
-        for item_data in items_data:
-            product = products[item_data["product_id"]]
-            item_total_price = product.price * item_data["quantity"]
+        for product_id, (product, quantity) in quantities.items():
+            item_total_price = product.price * quantity
             user_additional_amount += item_total_price
 
-            # Create order item
-            order_item = GroupOrderItem.objects.create(
-                group_order=order,
-                product=product,
-                user=user,
-                quantity=item_data["quantity"],
-                price=item_total_price,
-            )
-            new_items.append(order_item)
-
-        # Update order total price
-        order.total_price += user_additional_amount
-        order.save()
-
-        # Update or create participant entry
-        participant, created = GroupOrderParticipant.objects.get_or_create(
-            group_order=order,
-            user=user,
-            defaults={
-                "amount": user_additional_amount,
-                "delivery_fees": 0.0,
-                "vat": 0.0,
-                "discount": 0.0,
-            },
+            item = existing_items.get(product_id)
+            if item is not None:
+                item.quantity += quantity
+                item.price += item_total_price
+                updated_items.append(item)
+            else:
+                new_items.append(
+                    GroupOrderItem(
+                        group_order=order,
+                        product=product,
+                        user=user,
+                        quantity=quantity,
+                        price=item_total_price,
+                    )
+                )
+
+        if updated_items:
+            GroupOrderItem.objects.bulk_update(updated_items, ["quantity", "price"])
+        if new_items:
+            new_items = GroupOrderItem.objects.bulk_create(new_items)
+
+        # Update order total and participant amount in the database
+        participant = apply_amount_change(
+            order,
+            user,
+            user_additional_amount,
+            items_delta=len(new_items),
+            create_participant=True,
         )
 
-        if not created:
-            # Update existing participant
-            participant.amount += user_additional_amount
-            participant.save()
+        return {
+            "order": order,
+            "new_items": updated_items + new_items,
+            "user_total_amount": participant.amount,
+        }
+
+
+class OrderItemQuantitySerializer(serializers.Serializer):
+    """
+    Serializer for changing the quantity of an existing order item
+    """
+
+    item_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class BatchUpdateItemsSerializer(serializers.Serializer):
+    """
+    Serializer for applying several changes to the user's items in an order
+    at once: product upserts, quantity changes and removals
+    """
+
+    upserts = OrderItemCreateSerializer(many=True, required=False)
+    updates = OrderItemQuantitySerializer(many=True, required=False)
+    remove_item_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
+
+    def validate_upserts(self, value):
+        """Validate that all products exist and belong to the order's shop"""
+        order = self.context["order"]
+        product_ids = [item["product_id"] for item in value]
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError("Each product can only be upserted once")
+
+        products = {
+            p.id: p for p in Product.objects.filter(id__in=product_ids, shop=order.shop)
+        }
+
+        if len(products) != len(product_ids):
+            raise serializers.ValidationError(
+                "One or more products not found or don't belong to this shop"
+            )
+
+        # Keep the loaded products so create() doesn't query them again
+        for item in value:
+            item["product"] = products[item["product_id"]]
+
+        return value
+
+    def validate(self, attrs):
+        """Validate that the order is still open and the changes don't overlap"""
+        order = self.context["order"]
+        if order.status != GroupOrderStatusEnum.OPEN.value:
+            raise serializers.ValidationError("Cannot modify closed orders")
+
+        upserts = attrs.get("upserts", [])
+        updates = attrs.get("updates", [])
+        remove_item_ids = attrs.get("remove_item_ids", [])
+
+        if not (upserts or updates or remove_item_ids):
+            raise serializers.ValidationError("At least one change is required")
+
+        update_item_ids = [item["item_id"] for item in updates]
+        if len(set(update_item_ids)) != len(update_item_ids):
+            raise serializers.ValidationError("Each item can only be updated once")
+        if set(update_item_ids) & set(remove_item_ids):
+            raise serializers.ValidationError(
+                "An item can't be updated and removed at the same time"
+            )
+
+        return attrs
+
+    def create(self, validated_data):
+        """Apply all changes and update the totals once"""
+        order = self.context["order"]
+        user = get_user_from_user_auth(self.context["request"])
+        upserts = validated_data.get("upserts", [])
+        updates = validated_data.get("updates", [])
+        remove_item_ids = set(validated_data.get("remove_item_ids", []))
+
+        with transaction.atomic():
+            # Lock all of the user's items in the order, a basket is small
+            user_items = {
+                item.id: item
+                for item in GroupOrderItem.objects.select_for_update().filter(
+                    group_order=order, user=user
+                )
+            }
+
+            missing_item_ids = (
+                remove_item_ids | {item["item_id"] for item in updates}
+            ) - user_items.keys()
+            if missing_item_ids:
+                raise serializers.ValidationError(
+                    f"Items not found in your order: {sorted(missing_item_ids)}"
+                )
+
+            amount_change = 0
+            changed_items = {}
+
+            # Remove items
+            removed_items = [user_items.pop(item_id) for item_id in remove_item_ids]
+            amount_change -= sum(item.price for item in removed_items)
+
+            # Change quantities, keeping each item's unit price
+            for item_data in updates:
+                item = user_items[item_data["item_id"]]
+                changed_items[item.id] = item
+
+                new_price = item.price / item.quantity * item_data["quantity"]
+                amount_change += new_price - item.price
+                item.quantity = item_data["quantity"]
+                item.price = new_price
+
+            # Upsert products: set the quantity of the user's item for the
+            # product, or add a new item if there is none yet
+            items_by_product = {}
+            for item in user_items.values():
+                items_by_product.setdefault(item.product_id, item)
+
+            new_items = []
+            for item_data in upserts:
+                product = item_data["product"]
+                item = items_by_product.get(product.id)
+
+                if item is None:
+                    new_price = product.price * item_data["quantity"]
+                    amount_change += new_price
+                    new_items.append(
+                        GroupOrderItem(
+                            group_order=order,
+                            product=product,
+                            user=user,
+                            quantity=item_data["quantity"],
+                            price=new_price,
+                        )
+                    )
+                    continue
+
+                if item.id in changed_items:
+                    raise serializers.ValidationError(
+                        f"Product {product.id} can't be upserted while its item "
+                        "is also updated"
+                    )
+                changed_items[item.id] = item
+
+                new_price = item.price / item.quantity * item_data["quantity"]
+                amount_change += new_price - item.price
+                item.quantity = item_data["quantity"]
+                item.price = new_price
+
+            if removed_items:
+                GroupOrderItem.objects.filter(
+                    id__in=[item.id for item in removed_items]
+                ).delete()
+            if changed_items:
+                GroupOrderItem.objects.bulk_update(
+                    changed_items.values(), ["quantity", "price"]
+                )
+            if new_items:
+                GroupOrderItem.objects.bulk_create(new_items)
+
+            # Update participant amount, order total and items count once
+            participant = apply_amount_change(
+                order,
+                user,
+                amount_change,
+                items_delta=len(new_items) - len(removed_items),
+                create_participant=True,
+            )
 
         return {
             "order": order,
-            "new_items": new_items,
+            "items_added": len(new_items),
+            "items_updated": len(changed_items),
+            "items_removed": len(removed_items),
             "user_total_amount": participant.amount,
         }
 
@@ -178,82 +389,97 @@ class CreateOrderSerializer(serializers.Serializer):
     vat = serializers.FloatField(required=False, default=0.0)
     discount = serializers.FloatField(required=False, default=0.0)
 
-    def validate_shop_id(self, value):
-        """Validate that the shop exists"""
-
+    def validate(self, attrs):
+        """Validate that the shop exists and all products belong to it"""
         try:
-            Shop.objects.get(id=value)
+            shop = Shop.objects.get(id=attrs["shop_id"])
         except Shop.DoesNotExist:
-            raise serializers.ValidationError("Shop not found")
-        return value
+            raise serializers.ValidationError({"shop_id": "Shop not found"})
+
+        items_data = attrs.get("items", [])
+        product_ids = {item["product_id"] for item in items_data}
+        products = {
+            p.id: p for p in Product.objects.filter(id__in=product_ids, shop=shop)
+        }
+
+        if len(products) != len(product_ids):
+            raise serializers.ValidationError(
+                {"items": "One or more products not found or don't belong to this shop"}
+            )
+
+        # Keep the loaded shop and products so create() doesn't query them again
+        attrs["shop"] = shop
+        for item in items_data:
+            item["product"] = products[item["product_id"]]
+
+        return attrs
 
     def create(self, validated_data):
         """Create a new group order with items"""
 
-        user = self.context["request"].user.custom_user
+        user = get_user_from_user_auth(self.context["request"])
         items_data = validated_data.get("items", [])
-        shop = Shop.objects.get(id=validated_data["shop_id"])
+        delivery_fees = validated_data.get("delivery_fees", 0)
+        vat = validated_data.get("vat", 0)
+        discount = validated_data.get("discount", 0)
+
+        # Build order items and calculate the creator's amount in a single pass
+        participant_amount = 0
+        order_items = []
+
+        for product, quantity in merge_item_quantities(items_data).values():
+            item_total_price = product.price * quantity
+            participant_amount += item_total_price
+
+            order_items.append(
+                GroupOrderItem(
+                    product=product,
+                    user=user,
+                    quantity=quantity,
+                    price=item_total_price,
+                )
+            )
 
-        # Calculate total price
-        total_price = 0
-        product_ids = [item["product_id"] for item in items_data]
-        products = {p.id: p for p in Product.objects.filter(id__in=product_ids)}
+        # Add fees and taxes
+        total_price = participant_amount + delivery_fees + vat - discount
+
+        with transaction.atomic():
+            # Create the group order
+            group_order = GroupOrder.objects.create(
+                name=validated_data.get("name"),
+                created_by=user,
+                shop=validated_data["shop"],
+                total_price=total_price,
+                delivery_fees=delivery_fees,
+                vat=vat,
+                discount=discount,
+                status=GroupOrderStatusEnum.OPEN.value,
+                items_count=len(order_items),
+                participants_count=1,
+            )
 
-        for item in items_data:
-            product = products[item["product_id"]]
-            total_price += product.price * item["quantity"]
+            # Assign the unique order code derived from the new order id
+            allocate_order_code(group_order)
 
-        # Add fees and taxes
-        total_price += validated_data.get("delivery_fees", 0)
-        total_price += validated_data.get("vat", 0)
-        total_price -= validated_data.get("discount", 0)
-
-        # Generate unique order code
-        order_code = generate_unique_order_code()
-
-        # Create the group order
-        group_order = GroupOrder.objects.create(
-            name=validated_data["name"],
-            created_by=user,
-            shop=shop,
-            total_price=total_price,
-            delivery_fees=validated_data.get("delivery_fees", 0),
-            vat=validated_data.get("vat", 0),
-            discount=validated_data.get("discount", 0),
-            status=GroupOrderStatusEnum.OPEN.value,
-            code=order_code,
-        )
+            # Create all order items with a single insert
+            for order_item in order_items:
+                order_item.group_order = group_order
+            GroupOrderItem.objects.bulk_create(order_items)
 
-        # Create order items
-        for item_data in items_data:
-            product = products[item_data["product_id"]]
-            GroupOrderItem.objects.create(
+            # Create participant entry for the creator
+            GroupOrderParticipant.objects.create(
                 group_order=group_order,
-                product=product,
                 user=user,
-                quantity=item_data["quantity"],
-                price=product.price * item_data["quantity"],
+                amount=participant_amount,
+                delivery_fees=delivery_fees / 1,  # Will be split among participants
+                vat=vat / 1,
+                discount=discount / 1,
             )
 
-        # Create participant entry for the creator
-        participant_amount = sum(
-            products[item["product_id"]].price * item["quantity"] for item in items_data
-        )
-
-        GroupOrderParticipant.objects.create(
-            group_order=group_order,
-            user=user,
-            amount=participant_amount,
-            delivery_fees=validated_data.get("delivery_fees", 0)
-            / 1,  # Will be split among participants
-            vat=validated_data.get("vat", 0) / 1,
-            discount=validated_data.get("discount", 0) / 1,
-        )
-
         return group_order
 
 
-class OrderListSerializer(serializers.ModelSerializer):
+class OrderListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for listing orders with basic information
     """
@@ -269,18 +495,18 @@ class OrderListSerializer(serializers.ModelSerializer):
         Check if the current user is the creator of the order
         """
         user = get_user_from_user_auth(self.context["request"])
-        return obj.created_by == user
+        return obj.created_by_id == user.id
 
 
-class OrderDetailsSerializer(serializers.ModelSerializer):
+class OrderDetailsSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for detailed order information
     """
 
     created_by = serializers.CharField(source="created_by.username", read_only=True)
     shop_name = serializers.CharField(source="shop.name", read_only=True)
-    items_count = serializers.SerializerMethodField()
-    participants_count = serializers.SerializerMethodField()
+
+    sparse_select_related = {"created_by": "created_by", "shop_name": "shop"}
 
     class Meta:
         model = GroupOrder
@@ -300,12 +526,7 @@ class OrderDetailsSerializer(serializers.ModelSerializer):
             "items_count",
             "participants_count",
         ]
-
-    def get_items_count(self, obj):
-        return obj.items.count()
-
-    def get_participants_count(self, obj):
-        return obj.participants.count()
+        read_only_fields = fields
 
 
 class OrderItemSummarySerializer(serializers.ModelSerializer):
@@ -349,13 +570,32 @@ class UserOrderSummarySerializer(serializers.ModelSerializer):
 
     def get_items(self, obj):
         """Get all items for this user in the order"""
-        items = GroupOrderItem.objects.filter(
-            group_order=obj.group_order, user=obj.user
-        )
+        items_by_user = self.context.get("items_by_user")
+        if items_by_user is not None:
+            items = items_by_user.get(obj.user_id, [])
+        else:
+            items = GroupOrderItem.objects.filter(
+                group_order_id=obj.group_order_id, user_id=obj.user_id
+            ).select_related("product")
         return OrderItemSummarySerializer(items, many=True).data
 
 
-class GroupOrderSummarySerializer(serializers.ModelSerializer):
+# Related objects GroupOrderSummarySerializer needs, fetched in two queries
+GROUP_ORDER_SUMMARY_PREFETCH = [
+    Prefetch(
+        "participants",
+        queryset=GroupOrderParticipant.objects.select_related("user").order_by(
+            "user__username"
+        ),
+    ),
+    Prefetch(
+        "items",
+        queryset=GroupOrderItem.objects.select_related("product").order_by("id"),
+    ),
+]
+
+
+class GroupOrderSummarySerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for group order summary with users and their items
     """
@@ -366,6 +606,16 @@ class GroupOrderSummarySerializer(serializers.ModelSerializer):
     participants = serializers.SerializerMethodField()
     summary_stats = serializers.SerializerMethodField()
 
+    sparse_select_related = {
+        "created_by": "created_by",
+        "shop_name": "shop",
+        "shop_address": "shop",
+    }
+    sparse_prefetch_related = {
+        "participants": GROUP_ORDER_SUMMARY_PREFETCH,
+        "summary_stats": GROUP_ORDER_SUMMARY_PREFETCH,
+    }
+
     class Meta:
         model = GroupOrder
         fields = [
@@ -386,34 +636,35 @@ class GroupOrderSummarySerializer(serializers.ModelSerializer):
         ]
 
     def get_participants(self, obj):
-        """Get all participants with their items"""
-        participants = (
-            GroupOrderParticipant.objects.filter(group_order=obj)
-            .select_related("user")
-            .order_by("user__username")
-        )
+        """
+        Get all participants with their items. Expects the order to be fetched
+        with GROUP_ORDER_SUMMARY_PREFETCH, so no queries run here
+        """
+        # Group the order's items by user in memory
+        items_by_user = {}
+        for item in obj.items.all():
+            items_by_user.setdefault(item.user_id, []).append(item)
 
         return UserOrderSummarySerializer(
-            participants, many=True, context=self.context
+            obj.participants.all(),
+            many=True,
+            context={**self.context, "items_by_user": items_by_user},
         ).data
 
     def get_summary_stats(self, obj):
-        """Get summary statistics for the order"""
-        participants = GroupOrderParticipant.objects.filter(group_order=obj)
-        total_items = GroupOrderItem.objects.filter(group_order=obj).count()
-
-        total_paid = sum(p.paid_amount for p in participants)
-        total_unpaid = sum(p.amount - p.paid_amount for p in participants)
+        """
+        Get summary statistics for the order, computed from the prefetched
+        participants and items without extra queries
+        """
+        participants = obj.participants.all()
 
         return {
-            "total_participants": participants.count(),
-            "total_items": total_items,
-            "total_paid": total_paid,
-            "total_unpaid": total_unpaid,
-            "fully_paid_users": participants.filter(
-                paid_amount__gte=models.F("amount")
-            ).count(),
-            "unpaid_users": participants.filter(
-                paid_amount__lt=models.F("amount")
-            ).count(),
+            "total_participants": len(participants),
+            "total_items": len(obj.items.all()),
+            "total_paid": sum(p.paid_amount for p in participants),
+            "total_unpaid": sum(p.amount - p.paid_amount for p in participants),
+            "fully_paid_users": sum(
+                1 for p in participants if p.paid_amount >= p.amount
+            ),
+            "unpaid_users": sum(1 for p in participants if p.paid_amount < p.amount),
         }
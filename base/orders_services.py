@@ -0,0 +1,142 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from base.enums import GroupOrderStatusEnum
+from base.models import GroupOrder, GroupOrderParticipant
+
+
+def get_accessible_order(user, pk, queryset=None):
+    """
+    Return the order with pk if the user created it or participates in it.
+    Raises GroupOrder.DoesNotExist otherwise, so orders the user can't see
+    look the same as orders that don't exist.
+    """
+    if queryset is None:
+        queryset = GroupOrder.objects.all()
+
+    is_participant = GroupOrderParticipant.objects.filter(
+        group_order=OuterRef("pk"), user=user
+    )
+    return queryset.filter(Q(created_by=user) | Exists(is_participant)).get(pk=pk)
+
+
+def apply_amount_change(order, user, amount, items_delta=0, create_participant=False):
+    """
+    Add amount (may be negative) to the user's participant amount and to the
+    order total using in-database increments, so concurrent edits to the same
+    order never lose updates. items_delta adjusts the order's items_count the
+    same way. Must be called inside a transaction.
+
+    Refreshes the order's totals and counters and returns the refreshed
+    participant. Raises GroupOrderParticipant.DoesNotExist if the user is not
+    a participant, unless create_participant is set, in which case the
+    participant is upserted.
+    """
+    participants = GroupOrderParticipant.objects.filter(group_order=order, user=user)
+    participants_delta = 0
+
+    if not participants.update(amount=F("amount") + amount):
+        if not create_participant:
+            raise GroupOrderParticipant.DoesNotExist
+        try:
+            with transaction.atomic():
+                GroupOrderParticipant.objects.create(
+                    group_order=order,
+                    user=user,
+                    amount=amount,
+                    delivery_fees=0.0,
+                    vat=0.0,
+                    discount=0.0,
+                )
+            participants_delta = 1
+        except IntegrityError:
+            # A concurrent request added the participant first
+            participants.update(amount=F("amount") + amount)
+
+    GroupOrder.objects.filter(pk=order.pk).update(
+        total_price=F("total_price") + amount,
+        items_count=F("items_count") + items_delta,
+        participants_count=F("participants_count") + participants_delta,
+        version=F("version") + 1,
+        updated_at=timezone.now(),
+    )
+    order.refresh_from_db(
+        fields=[
+            "total_price",
+            "items_count",
+            "participants_count",
+            "version",
+            "updated_at",
+        ]
+    )
+
+    return participants.get()
+
+
+def add_participant(order, user):
+    """
+    Add the user to the order with a zero initial amount and bump the order's
+    participants_count. Must be called inside a transaction. Raises
+    IntegrityError if the user is already a participant.
+    """
+    participant = GroupOrderParticipant.objects.create(
+        group_order=order,
+        user=user,
+        amount=0.0,
+        delivery_fees=0.0,
+        vat=0.0,
+        discount=0.0,
+    )
+
+    GroupOrder.objects.filter(pk=order.pk).update(
+        participants_count=F("participants_count") + 1,
+        version=F("version") + 1,
+        updated_at=timezone.now(),
+    )
+    order.refresh_from_db(fields=["participants_count", "version", "updated_at"])
+
+    return participant
+
+
+# Statuses an order may move to, mapped to the statuses it may move from
+ORDER_STATUS_TRANSITIONS = {
+    GroupOrderStatusEnum.LOCKED: [GroupOrderStatusEnum.OPEN],
+    GroupOrderStatusEnum.ORDERED: [GroupOrderStatusEnum.LOCKED],
+    GroupOrderStatusEnum.COMPLETED: [
+        GroupOrderStatusEnum.LOCKED,
+        GroupOrderStatusEnum.ORDERED,
+    ],
+    GroupOrderStatusEnum.CANCELLED: [
+        GroupOrderStatusEnum.OPEN,
+        GroupOrderStatusEnum.LOCKED,
+        GroupOrderStatusEnum.ORDERED,
+    ],
+}
+
+# Extra conditions an order must meet for a transition
+ORDER_STATUS_TRANSITION_CONDITIONS = {
+    GroupOrderStatusEnum.LOCKED: Q(items_count__gt=0),
+}
+
+
+def transition_order_status(order_id, user, target_status):
+    """
+    Move an order created by user to target_status with a single conditional
+    UPDATE, so double-clicks and concurrent transitions can't both succeed.
+    Returns True if the order was moved, False if it doesn't exist, isn't
+    owned by user or can't move to target_status from its current status.
+    """
+    allowed_from = [s.value for s in ORDER_STATUS_TRANSITIONS[target_status]]
+    condition = ORDER_STATUS_TRANSITION_CONDITIONS.get(target_status, Q())
+
+    updated = (
+        GroupOrder.objects.filter(condition)
+        .filter(pk=order_id, created_by=user, status__in=allowed_from)
+        .update(
+            status=target_status.value,
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+        )
+    )
+    return updated == 1
@@ -2,25 +2,41 @@ from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
+from base.conditional import ConditionalGetMixin, make_etag
 from base.enums import GroupOrderStatusEnum
+from base.idempotency import IdempotentCreateMixin
 from base.models import GroupOrder, GroupOrderParticipant, GroupOrderItem
 from base.orders_serializers import (
     OrderListSerializer,
     OrderDetailsSerializer,
     CreateOrderSerializer,
     AddItemsToOrderSerializer,
+    BatchUpdateItemsSerializer,
     JoinOrderSerializer,
     GroupOrderSummarySerializer,
 )
+from base.orders_export import (
+    get_export_participants,
+    stream_orders_csv,
+    stream_orders_jsonl,
+)
+from base.orders_services import (
+    apply_amount_change,
+    get_accessible_order,
+    transition_order_status,
+)
+from base.pagination import ChangesPagination, InvalidCursorError, KeysetPagination
+from base.reference_data import serve_reference_data
 from base.utils import get_user_from_user_auth
 
 
-class CreateOrderView(generics.CreateAPIView):
+class CreateOrderView(IdempotentCreateMixin, generics.CreateAPIView):
     """
-    Create a new group order with items
+    Create a new group order with items. Supports the Idempotency-Key header
     """
 
     serializer_class = CreateOrderSerializer
@@ -53,9 +69,10 @@ class CreateOrderView(generics.CreateAPIView):
             )
 
 
-class JoinOrderView(generics.CreateAPIView):
+class JoinOrderView(IdempotentCreateMixin, generics.CreateAPIView):
     """
-    Join an existing group order using order code
+    Join an existing group order using order code. Supports the
+    Idempotency-Key header
     """
 
     serializer_class = JoinOrderSerializer
@@ -94,9 +111,9 @@ class JoinOrderView(generics.CreateAPIView):
             )
 
 
-class AddItemsToOrderView(generics.CreateAPIView):
+class AddItemsToOrderView(IdempotentCreateMixin, generics.CreateAPIView):
     """
-    Add items to an existing group order
+    Add items to an existing group order. Supports the Idempotency-Key header
     """
 
     serializer_class = AddItemsToOrderSerializer
@@ -105,7 +122,9 @@ class AddItemsToOrderView(generics.CreateAPIView):
     def get_order(self):
         """Get the order and check if user can add items to it"""
         order_id = self.kwargs.get("pk")
-        order = get_object_or_404(GroupOrder, pk=order_id)
+        order = get_object_or_404(
+            GroupOrder.objects.select_related("created_by", "shop"), pk=order_id
+        )
         return order
 
     def create(self, request, *args, **kwargs):
@@ -164,7 +183,9 @@ class RemoveItemsFromOrderView(generics.CreateAPIView):
     def get_order(self):
         """Get the order and check if user can remove items from it"""
         order_id = self.kwargs.get("pk")
-        order = get_object_or_404(GroupOrder, pk=order_id)
+        order = get_object_or_404(
+            GroupOrder.objects.select_related("created_by", "shop"), pk=order_id
+        )
         return order
 
     def create(self, request, *args, **kwargs):
@@ -179,13 +200,6 @@ class RemoveItemsFromOrderView(generics.CreateAPIView):
 
             user = get_user_from_user_auth(request)
 
-            # Check if order is still open
-            if order.status != GroupOrderStatusEnum.OPEN.value:
-                return Response(
-                    {"success": False, "error": "Cannot modify closed orders"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
             item_ids = request.data.get("item_ids", [])
             if not item_ids:
                 return Response(
@@ -193,33 +207,34 @@ class RemoveItemsFromOrderView(generics.CreateAPIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Get items to remove (only user's own items)
-            items_to_remove = GroupOrderItem.objects.filter(
-                id__in=item_ids, group_order=order, user=user
-            )
-
-            if not items_to_remove.exists():
-                return Response(
-                    {"success": False, "error": "No valid items found to remove"},
-                    status=status.HTTP_400_BAD_REQUEST,
+            with transaction.atomic():
+                # Lock items to remove (only user's own items) so a concurrent
+                # request can't subtract the same items twice
+                items_to_remove = list(
+                    GroupOrderItem.objects.select_for_update().filter(
+                        id__in=item_ids, group_order=order, user=user
+                    )
                 )
 
-            # Calculate amount to subtract
-            removed_amount = sum(item.price * item.quantity for item in items_to_remove)
-            removed_count = items_to_remove.count()
+                if not items_to_remove:
+                    return Response(
+                        {"success": False, "error": "No valid items found to remove"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
 
-            # Remove items
-            items_to_remove.delete()
+                # Item price already holds the line total (unit price * quantity)
+                removed_amount = sum(item.price for item in items_to_remove)
+                removed_count = len(items_to_remove)
 
-            # Update participant amount and order total
-            participant = GroupOrderParticipant.objects.get(
-                group_order=order, user=user
-            )
-            participant.amount -= removed_amount
-            participant.save()
+                # Remove items
+                GroupOrderItem.objects.filter(
+                    id__in=[item.id for item in items_to_remove]
+                ).delete()
 
-            order.total_price -= removed_amount
-            order.save()
+                # Update participant amount, order total and items count
+                apply_amount_change(
+                    order, user, -removed_amount, items_delta=-removed_count
+                )
 
             # Return updated order details
             detail_serializer = OrderDetailsSerializer(order)
@@ -254,6 +269,65 @@ class RemoveItemsFromOrderView(generics.CreateAPIView):
             )
 
 
+class BatchUpdateItemsView(generics.CreateAPIView):
+    """
+    Apply several item upserts, quantity changes and removals to a group order
+    at once
+    """
+
+    serializer_class = BatchUpdateItemsSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_order(self):
+        """Get the order the items belong to"""
+        order_id = self.kwargs.get("pk")
+        order = get_object_or_404(
+            GroupOrder.objects.select_related("created_by", "shop"), pk=order_id
+        )
+        return order
+
+    def create(self, request, *args, **kwargs):
+        try:
+            order = self.get_order()
+
+            serializer = self.get_serializer(
+                data=request.data, context={"order": order, "request": request}
+            )
+            serializer.is_valid(raise_exception=True)
+
+            # Apply all changes to the order
+            result = serializer.save()
+
+            # Return updated order details
+            detail_serializer = OrderDetailsSerializer(result["order"])
+
+            return Response(
+                {
+                    "success": True,
+                    "message": "Order items updated successfully",
+                    "data": {
+                        "order": detail_serializer.data,
+                        "items_added": result["items_added"],
+                        "items_updated": result["items_updated"],
+                        "items_removed": result["items_removed"],
+                        "user_total_amount": result["user_total_amount"],
+                    },
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        except GroupOrderParticipant.DoesNotExist:
+            return Response(
+                {"success": False, "error": "You are not a participant in this order"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            return Response(
+                {"success": False, "error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+
 class UpdateItemQuantityView(generics.UpdateAPIView):
     """
     Update quantity of a specific item in a group order
@@ -264,7 +338,13 @@ class UpdateItemQuantityView(generics.UpdateAPIView):
     def get_object(self):
         item_id = self.kwargs.get("item_id")
         user = get_user_from_user_auth(self.request)
-        return get_object_or_404(GroupOrderItem, id=item_id, user=user)
+        return get_object_or_404(
+            GroupOrderItem.objects.select_related(
+                "group_order__created_by", "group_order__shop", "product"
+            ),
+            id=item_id,
+            user=user,
+        )
 
     def update(self, request, *args, **kwargs):
         try:
@@ -279,13 +359,6 @@ class UpdateItemQuantityView(generics.UpdateAPIView):
 
             user = get_user_from_user_auth(request)
 
-            # Check if order is still open
-            if order.status != GroupOrderStatusEnum.OPEN.value:
-                return Response(
-                    {"success": False, "error": "Cannot modify closed orders"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
             new_quantity = request.data.get("quantity")
             if new_quantity is None:
                 return Response(
@@ -303,24 +376,28 @@ class UpdateItemQuantityView(generics.UpdateAPIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Calculate price difference
-            old_total = item.price * item.quantity
-            new_total = item.price * new_quantity
-            price_difference = new_total - old_total
+            with transaction.atomic():
+                # Re-read the item under a row lock so concurrent quantity
+                # changes are applied one after the other
+                locked_item = (
+                    GroupOrderItem.objects.select_for_update()
+                    .filter(id=item.id)
+                    .values("quantity", "price")
+                    .get()
+                )
 
-            # Update item quantity
-            item.quantity = new_quantity
-            item.save()
+                # Item price holds the line total, derive the unit price from it
+                unit_price = locked_item["price"] / locked_item["quantity"]
+                new_total = unit_price * new_quantity
+                price_difference = new_total - locked_item["price"]
 
-            # Update participant amount and order total
-            participant = GroupOrderParticipant.objects.get(
-                group_order=order, user=user
-            )
-            participant.amount += price_difference
-            participant.save()
+                # Update item quantity
+                item.quantity = new_quantity
+                item.price = new_total
+                item.save(update_fields=["quantity", "price"])
 
-            order.total_price += price_difference
-            order.save()
+                # Update participant amount and order total
+                apply_amount_change(order, user, price_difference)
 
             # Return updated order details
             detail_serializer = OrderDetailsSerializer(order)
@@ -335,8 +412,8 @@ class UpdateItemQuantityView(generics.UpdateAPIView):
                             "id": item.id,
                             "product_name": item.product.name,
                             "new_quantity": item.quantity,
-                            "price_per_item": item.price,
-                            "total_price": item.price * item.quantity,
+                            "price_per_item": unit_price,
+                            "total_price": item.price,
                         },
                         "price_difference": price_difference,
                     },
@@ -366,7 +443,8 @@ class UpdateItemQuantityView(generics.UpdateAPIView):
 
 class OrderListView(generics.ListAPIView):
     """
-    List all orders for the authenticated user
+    List all orders for the authenticated user. Send a cursor or limit query
+    param to get keyset-paginated results
     """
 
     serializer_class = OrderListSerializer
@@ -374,9 +452,7 @@ class OrderListView(generics.ListAPIView):
 
     def get_queryset(self):
         user = get_user_from_user_auth(self.request)
-        queryset = GroupOrder.objects.filter(
-            Q(created_by=user) | Q(participants__user=user)
-        ).distinct()
+        queryset = GroupOrder.objects.accessible_to(user)
 
         # Filter by status if provided
         status_filter = self.request.query_params.get("status", None)
@@ -393,6 +469,14 @@ class OrderListView(generics.ListAPIView):
     def list(self, request, *args, **kwargs):
         try:
             queryset = self.get_queryset()
+
+            # Keyset pagination when the client sends a cursor or limit
+            paginator = KeysetPagination(ordering=("-created_at", "-id"))
+            if paginator.is_requested(request):
+                page = paginator.paginate_queryset(queryset, request)
+                serializer = self.get_serializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data)
+
             serializer = self.get_serializer(queryset, many=True)
             return Response(
                 {
@@ -402,6 +486,11 @@ class OrderListView(generics.ListAPIView):
                 },
                 status=status.HTTP_200_OK,
             )
+        except InvalidCursorError as e:
+            return Response(
+                {"success": False, "error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except Exception as e:
             return Response(
                 {"success": False, "error": str(e)},
@@ -411,7 +500,8 @@ class OrderListView(generics.ListAPIView):
 
 class ParticipatedOrdersView(generics.ListAPIView):
     """
-    List orders that the authenticated user has participated in (not created)
+    List orders that the authenticated user has participated in (not created).
+    Send a cursor or limit query param to get keyset-paginated results
     """
 
     serializer_class = OrderListSerializer
@@ -421,7 +511,7 @@ class ParticipatedOrdersView(generics.ListAPIView):
         user = get_user_from_user_auth(self.request)
 
         # Get orders where user is a participant but not the creator
-        queryset = GroupOrder.objects.filter(participants__user=user).distinct()
+        queryset = GroupOrder.objects.participated_by(user)
 
         # Filter by status if provided
         status_filter = self.request.query_params.get("status", None)
@@ -438,6 +528,14 @@ class ParticipatedOrdersView(generics.ListAPIView):
     def list(self, request, *args, **kwargs):
         try:
             queryset = self.get_queryset()
+
+            # Keyset pagination when the client sends a cursor or limit
+            paginator = KeysetPagination(ordering=("-created_at", "-id"))
+            if paginator.is_requested(request):
+                page = paginator.paginate_queryset(queryset, request)
+                serializer = self.get_serializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data)
+
             serializer = self.get_serializer(queryset, many=True)
             return Response(
                 {
@@ -447,6 +545,56 @@ class ParticipatedOrdersView(generics.ListAPIView):
                 },
                 status=status.HTTP_200_OK,
             )
+        except InvalidCursorError as e:
+            return Response(
+                {"success": False, "error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            return Response(
+                {"success": False, "error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class OrderChangesView(generics.ListAPIView):
+    """
+    List the authenticated user's orders changed since a sync token, oldest
+    change first. Send the next_token of the previous response as since, and
+    keep syncing while has_more is true. Cancelled orders are returned as
+    tombstones, and every write to an order, its items or its participants
+    moves its updated_at
+    """
+
+    serializer_class = OrderListSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = get_user_from_user_auth(self.request)
+        return GroupOrder.objects.accessible_to(user)
+
+    def list(self, request, *args, **kwargs):
+        try:
+            paginator = ChangesPagination()
+            orders = paginator.paginate_queryset(self.get_queryset(), request)
+
+            changed = []
+            tombstones = []
+            for order in orders:
+                if order.status == GroupOrderStatusEnum.CANCELLED.value:
+                    tombstones.append(order.id)
+                else:
+                    changed.append(order)
+
+            serializer = self.get_serializer(changed, many=True)
+            return paginator.get_paginated_response(
+                serializer.data, tombstones=tombstones
+            )
+        except InvalidCursorError:
+            return Response(
+                {"success": False, "error": "Invalid since token"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except Exception as e:
             return Response(
                 {"success": False, "error": str(e)},
@@ -454,7 +602,64 @@ class ParticipatedOrdersView(generics.ListAPIView):
             )
 
 
-class OrderDetailView(generics.RetrieveAPIView):
+class OrderExportView(generics.GenericAPIView):
+    """
+    Stream the authenticated user's order history with their own items and
+    amounts, as CSV or JSON Lines. Rows are read through a server-side cursor
+    and written as they are fetched, so memory stays flat for any history
+    """
+
+    permission_classes = [IsAuthenticated]
+    export_format = "csv"
+
+    export_formats = {
+        "csv": (stream_orders_csv, "text/csv", "orders.csv"),
+        "jsonl": (stream_orders_jsonl, "application/jsonl", "orders.jsonl"),
+    }
+
+    def perform_content_negotiation(self, request, force=False):
+        # The URL picks the export format, so don't answer 406 to clients
+        # accepting only text/csv or application/jsonl. Errors are JSON
+        renderer = self.get_renderers()[0]
+        return renderer, renderer.media_type
+
+    def get(self, request, *args, **kwargs):
+        user = get_user_from_user_auth(request)
+        participants = get_export_participants(
+            user, status=request.query_params.get("status")
+        )
+
+        stream, content_type, filename = self.export_formats[self.export_format]
+        response = StreamingHttpResponse(
+            stream(participants), content_type=content_type
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class OrderConditionalGetMixin(ConditionalGetMixin):
+    """
+    ETag of a single-order view, derived from the order's updated_at and its
+    version, which every write to the order, its items or its participants
+    bumps. Only the order's version columns are read before a 304.
+    """
+
+    def get_conditional_state(self):
+        user = get_user_from_user_auth(self.request)
+        order = get_accessible_order(
+            user, self.kwargs["pk"], GroupOrder.objects.only("version", "updated_at")
+        )
+        etag = make_etag(
+            type(self).__name__,
+            order.pk,
+            order.version,
+            order.updated_at.isoformat(),
+            self.request.get_full_path(),
+        )
+        return etag, order.updated_at
+
+
+class OrderDetailView(OrderConditionalGetMixin, generics.RetrieveAPIView):
     """
     Retrieve detailed information about a specific order
     """
@@ -463,10 +668,14 @@ class OrderDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        # Only join the relations of the fields the client asked for
+        return OrderDetailsSerializer.shrink_queryset(
+            GroupOrder.objects.all(), self.request
+        )
+
+    def get_object(self):
         user = get_user_from_user_auth(self.request)
-        return GroupOrder.objects.filter(
-            Q(created_by=user) | Q(participants__user=user)
-        ).distinct()
+        return get_accessible_order(user, self.kwargs["pk"], self.get_queryset())
 
     def retrieve(self, request, *args, **kwargs):
         try:
@@ -487,7 +696,7 @@ class OrderDetailView(generics.RetrieveAPIView):
             )
 
 
-class GroupOrderSummaryView(generics.RetrieveAPIView):
+class GroupOrderSummaryView(OrderConditionalGetMixin, generics.RetrieveAPIView):
     """
     Get detailed summary of a group order with items grouped by user
     """
@@ -496,11 +705,15 @@ class GroupOrderSummaryView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        # Only join and prefetch what the fields the client asked for need
+        return GroupOrderSummarySerializer.shrink_queryset(
+            GroupOrder.objects.all(), self.request
+        )
+
+    def get_object(self):
         user = get_user_from_user_auth(self.request)
         # Only allow users who created or participated in the order
-        return GroupOrder.objects.filter(
-            Q(created_by=user) | Q(participants__user=user)
-        ).distinct()
+        return get_accessible_order(user, self.kwargs["pk"], self.get_queryset())
 
     def retrieve(self, request, *args, **kwargs):
         try:
@@ -534,34 +747,39 @@ class LockOrderView(generics.UpdateAPIView):
     def get_object(self):
         order_id = self.kwargs.get("pk")
         user = get_user_from_user_auth(self.request)
-        return get_object_or_404(GroupOrder, pk=order_id, created_by=user)
+        return get_object_or_404(
+            GroupOrder.objects.select_related("created_by", "shop"),
+            pk=order_id,
+            created_by=user,
+        )
 
     def update(self, request, *args, **kwargs):
         try:
-            order = self.get_object()
+            user = get_user_from_user_auth(request)
 
-            # Check if order is already locked or closed
-            if order.status != GroupOrderStatusEnum.OPEN.value:
-                return Response(
-                    {
-                        "success": False,
-                        "error": f"Order is already {order.status.lower()}",
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            # Lock the order if it is open and has any items
+            if not transition_order_status(
+                self.kwargs.get("pk"), user, GroupOrderStatusEnum.LOCKED
+            ):
+                order = self.get_object()
+
+                # Check if order is already locked or closed
+                if order.status != GroupOrderStatusEnum.OPEN.value:
+                    return Response(
+                        {
+                            "success": False,
+                            "error": f"Order is already {order.status.lower()}",
+                        },
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
 
-            # Check if order has any items
-            if not order.items.exists():
                 return Response(
                     {"success": False, "error": "Cannot lock an empty order"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Lock the order by changing status
-            order.status = GroupOrderStatusEnum.LOCKED.value
-            order.save()
-
             # Return updated order details
+            order = self.get_object()
             detail_serializer = OrderDetailsSerializer(order)
 
             return Response(
@@ -598,17 +816,21 @@ class CancelOrderView(generics.UpdateAPIView):
     def get_object(self):
         order_id = self.kwargs.get("pk")
         user = get_user_from_user_auth(self.request)
-        return get_object_or_404(GroupOrder, pk=order_id, created_by=user)
+        return get_object_or_404(
+            GroupOrder.objects.select_related("created_by", "shop"),
+            pk=order_id,
+            created_by=user,
+        )
 
     def update(self, request, *args, **kwargs):
         try:
-            order = self.get_object()
+            user = get_user_from_user_auth(request)
 
-            # Check if order can be cancelled
-            if order.status in [
-                GroupOrderStatusEnum.COMPLETED.value,
-                GroupOrderStatusEnum.CANCELLED.value,
-            ]:
+            # Cancel the order if it isn't completed or cancelled yet
+            if not transition_order_status(
+                self.kwargs.get("pk"), user, GroupOrderStatusEnum.CANCELLED
+            ):
+                order = self.get_object()
                 return Response(
                     {
                         "success": False,
@@ -617,11 +839,8 @@ class CancelOrderView(generics.UpdateAPIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Cancel the order
-            order.status = GroupOrderStatusEnum.CANCELLED.value
-            order.save()
-
             # Return updated order details
+            order = self.get_object()
             detail_serializer = OrderDetailsSerializer(order)
 
             return Response(
@@ -658,14 +877,22 @@ class MarkOrderedView(generics.UpdateAPIView):
     def get_object(self):
         order_id = self.kwargs.get("pk")
         user = get_user_from_user_auth(self.request)
-        return get_object_or_404(GroupOrder, pk=order_id, created_by=user)
+        return get_object_or_404(
+            GroupOrder.objects.select_related("created_by", "shop"),
+            pk=order_id,
+            created_by=user,
+        )
 
     def update(self, request, *args, **kwargs):
         try:
-            order = self.get_object()
+            user = get_user_from_user_auth(request)
 
-            # Check if order can be marked as ordered
-            if order.status != GroupOrderStatusEnum.LOCKED.value:
+            # Mark as ordered if the order is locked
+            if not transition_order_status(
+                self.kwargs.get("pk"), user, GroupOrderStatusEnum.ORDERED
+            ):
+                # Raises 404 if the order doesn't exist or isn't the user's
+                self.get_object()
                 return Response(
                     {
                         "success": False,
@@ -674,11 +901,8 @@ class MarkOrderedView(generics.UpdateAPIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Mark as ordered
-            order.status = GroupOrderStatusEnum.ORDERED.value
-            order.save()
-
             # Return updated order details
+            order = self.get_object()
             detail_serializer = OrderDetailsSerializer(order)
 
             return Response(
@@ -715,39 +939,41 @@ class CompleteOrderView(generics.UpdateAPIView):
     def get_object(self):
         order_id = self.kwargs.get("pk")
         user = get_user_from_user_auth(self.request)
-        return get_object_or_404(GroupOrder, pk=order_id, created_by=user)
+        return get_object_or_404(
+            GroupOrder.objects.select_related("created_by", "shop"),
+            pk=order_id,
+            created_by=user,
+        )
 
     def update(self, request, *args, **kwargs):
         try:
-            order = self.get_object()
+            user = get_user_from_user_auth(request)
 
-            # Check if order can be completed
-            if order.status not in [
-                GroupOrderStatusEnum.ORDERED.value,
-                GroupOrderStatusEnum.LOCKED.value,
-            ]:
-                return Response(
-                    {
-                        "success": False,
-                        "error": "Only ordered or locked orders can be completed",
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            # Complete the order if it is ordered or locked
+            if not transition_order_status(
+                self.kwargs.get("pk"), user, GroupOrderStatusEnum.COMPLETED
+            ):
+                order = self.get_object()
+
+                if order.status == GroupOrderStatusEnum.COMPLETED.value:
+                    return Response(
+                        {
+                            "success": False,
+                            "error": "Order is already completed",
+                        },
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
 
-            if order.status == GroupOrderStatusEnum.COMPLETED.value:
                 return Response(
                     {
                         "success": False,
-                        "error": "Order is already completed",
+                        "error": "Only ordered or locked orders can be completed",
                     },
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Complete the order
-            order.status = GroupOrderStatusEnum.COMPLETED.value
-            order.save()
-
             # Return updated order details
+            order = self.get_object()
             detail_serializer = OrderDetailsSerializer(order)
 
             return Response(
@@ -778,17 +1004,6 @@ class CompleteOrderView(generics.UpdateAPIView):
 @permission_classes([IsAuthenticated])
 def order_statuses(request):
     """
-    Get all available order statuses
+    Get all available order statuses, served pre-encoded
     """
-    try:
-
-        statuses = [
-            {"value": choice[0], "label": choice[1]}
-            for choice in GroupOrderStatusEnum.choices
-        ]
-        return Response({"success": True, "data": statuses}, status=status.HTTP_200_OK)
-    except Exception as e:
-        return Response(
-            {"success": False, "error": str(e)},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
+    return serve_reference_data(request, "order_statuses")
@@ -0,0 +1,180 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Encode a list of values as an opaque URL-safe cursor"""
+    payload = json.dumps(values, default=lambda value: value.isoformat())
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, length=None):
+    """Decode a cursor created by encode_cursor back into its list of values"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error):
+        raise InvalidCursorError("Invalid cursor")
+
+    if not isinstance(values, list) or (length is not None and len(values) != length):
+        raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+class KeysetPagination:
+    """
+    Opt-in keyset (cursor) pagination over a unique ordering such as
+    ("-created_at", "-id"). It only applies when the request has a cursor or
+    limit query param, and returns a next_cursor instead of an exact count, so
+    deep pages cost the same as the first one.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    default_limit = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    max_limit = 100
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+        self.next_cursor = None
+
+    def is_requested(self, request):
+        """Whether the client asked for a paginated response"""
+        return (
+            self.cursor_query_param in request.query_params
+            or self.limit_query_param in request.query_params
+        )
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, ""))
+        except ValueError:
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_ordering_field(self, queryset, name):
+        """The model field or annotation output field of an ordering name"""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        try:
+            return queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise ValueError(f"Cannot paginate over unknown field {name}")
+
+    def parse_cursor_values(self, queryset, values):
+        """
+        Convert decoded cursor values to the Python types of their ordering
+        fields, so a tampered cursor is rejected instead of failing in the query
+        """
+        parsed = []
+        for field, value in zip(self.ordering, values):
+            model_field = self.get_ordering_field(queryset, field.lstrip("-"))
+            if value is None:
+                raise InvalidCursorError("Invalid cursor")
+            try:
+                value = model_field.to_python(value)
+                model_field.run_validators(value)
+            except (ValidationError, TypeError, ValueError, OverflowError):
+                raise InvalidCursorError("Invalid cursor")
+            parsed.append(value)
+        return parsed
+
+    def get_after_filter(self, values):
+        """Filter rows that come after the given ordering values"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request):
+        """Return one page of rows and remember the cursor of the next page"""
+        limit = self.get_limit(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        if cursor:
+            values = decode_cursor(cursor, length=len(self.ordering))
+            values = self.parse_cursor_values(queryset, values)
+            queryset = queryset.filter(self.get_after_filter(values))
+
+        # Fetch one extra row to know whether there is a next page
+        rows = list(queryset.order_by(*self.ordering)[: limit + 1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            self.next_cursor = encode_cursor(
+                [getattr(last, field.lstrip("-")) for field in self.ordering]
+            )
+
+        return rows
+
+    def get_paginated_response(self, data, **extra):
+        return Response(
+            {"success": True, **extra, "data": data, "next_cursor": self.next_cursor},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ChangesPagination(KeysetPagination):
+    """
+    Keyset pagination over ("updated_at", "id") for incremental sync. The
+    client's since token is the cursor, and a next token is always returned.
+
+    Once the client is caught up, the next token lags ORDER_CHANGES_LAG
+    behind now, so rows whose transaction committed after a sync but with an
+    earlier updated_at are still picked up. Rows changed within the lag can
+    be returned twice, clients upsert them by id.
+    """
+
+    cursor_query_param = "since"
+
+    def __init__(self):
+        super().__init__(ordering=("updated_at", "id"))
+        self.has_more = False
+
+    def is_requested(self, request):
+        return True
+
+    def parse_cursor_values(self, queryset, values):
+        updated_at, order_id = super().parse_cursor_values(queryset, values)
+        # Tokens are issued with a UTC offset. A naive or date-only timestamp
+        # would be read in the server time zone and could skip changes
+        if timezone.is_naive(updated_at):
+            raise InvalidCursorError("Invalid cursor")
+        return [updated_at, order_id]
+
+    def paginate_queryset(self, queryset, request):
+        rows = super().paginate_queryset(queryset, request)
+        self.has_more = self.next_cursor is not None
+
+        if not self.has_more:
+            horizon = timezone.now() - settings.ORDER_CHANGES_LAG
+            self.next_cursor = encode_cursor([horizon, 0])
+
+        return rows
+
+    def get_paginated_response(self, data, **extra):
+        return Response(
+            {
+                "success": True,
+                **extra,
+                "data": data,
+                "next_token": self.next_cursor,
+                "has_more": self.has_more,
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,40 @@
+import codecs
+import io
+import re
+
+from rest_framework.parsers import JSONParser, get_encoding
+
+from base.renderers import FastJSONRenderer, orjson
+
+# Integer literals that may not fit in 64 bits, which orjson parses as floats
+# where the stdlib keeps them exact. Long digit runs inside strings only cost
+# a needless fallback
+LONG_INTEGER_RE = re.compile(rb"[0-9]{19,}")
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that decodes with orjson when it is installed. Bodies orjson
+    rejects or could parse differently, such as lone surrogate escapes or
+    integers over 64 bits, go to the stdlib parser, so the result and the
+    errors are the same as JSONParser's.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        encoding = get_encoding(parser_context or {})
+        raw = stream.read()
+        try:
+            body = raw
+            if codecs.lookup(encoding).name != "utf-8":
+                body = raw.decode(encoding).encode("utf-8")
+            if not LONG_INTEGER_RE.search(body):
+                return orjson.loads(body)
+        except ValueError:
+            pass
+
+        return super().parse(io.BytesIO(raw), media_type, parser_context)
@@ -0,0 +1,65 @@
+import json
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+
+from base.conditional import make_etag
+from base.enums import (
+    GroupOrderStatusEnum,
+    ShopCategoryEnum,
+    UserAcceptedPaymentMethodsEnum,
+)
+
+# Reference data only changes with a deploy, let clients keep it. Private,
+# since the endpoints require authentication and shared caches would not
+REFERENCE_DATA_CACHE_CONTROL = "private, max-age=86400"
+
+
+def get_choices_data(enum):
+    return [{"value": name, "label": label} for name, label in enum.choices()]
+
+
+REFERENCE_DATA = {
+    "order_statuses": get_choices_data(GroupOrderStatusEnum),
+    "shop_categories": get_choices_data(ShopCategoryEnum),
+    "payment_methods": get_choices_data(UserAcceptedPaymentMethodsEnum),
+}
+
+
+def encode_payload(data):
+    """Encode a success payload once, returning its bytes and ETag"""
+    content = json.dumps(
+        {"success": True, "data": data}, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    return content, make_etag(content.decode("utf-8"))
+
+
+# Pre-encoded responses, built once at import time
+ENCODED_REFERENCE_DATA = {
+    name: encode_payload(data) for name, data in REFERENCE_DATA.items()
+}
+ENCODED_REFERENCE_DATA["all"] = encode_payload(REFERENCE_DATA)
+
+
+def serve_reference_data(request, name):
+    """Serve pre-encoded reference data, or a 304 if the client has it"""
+    content, etag = ENCODED_REFERENCE_DATA[name]
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type="application/json")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = REFERENCE_DATA_CACHE_CONTROL
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def reference_data(request):
+    """
+    Get order statuses, shop categories and payment methods in one request
+    """
+    return serve_reference_data(request, "all")
@@ -0,0 +1,108 @@
+import math
+import re
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Datetimes go through DRF's encoder like with the stdlib renderer, and
+# non-string dict keys are converted to strings like json.dumps does
+ORJSON_OPTIONS = (
+    (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+)
+
+# Exponents of floats orjson writes as 1e16 and 1e-7, where the stdlib
+# writes 1e+16 and 1e-07. Starting at the "e" keeps the search fast
+ORJSON_EXPONENT_RE = re.compile(rb"e-?[0-9]")
+
+drf_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Encode types orjson doesn't handle the same way DRF's encoder does"""
+    return drf_encoder.default(obj)
+
+
+def has_exponent_float(content):
+    """
+    Whether orjson output has a float in exponent notation. Such text inside
+    a string, like "1e5", only costs a needless fallback
+    """
+    return any(
+        content[match.start() - 1 : match.start()].isdigit()
+        for match in ORJSON_EXPONENT_RE.finditer(content)
+    )
+
+
+def has_small_decimal_float(content):
+    """
+    Whether orjson output has a float below 1e-4 written as a decimal, such
+    as 0.00005, which the stdlib writes as 5e-05
+    """
+    start = content.find(b"0.0000")
+    while start != -1:
+        # Skip larger numbers like 10.00005
+        if not content[start - 1 : start].isdigit():
+            return True
+        start = content.find(b"0.0000", start + 1)
+    return False
+
+
+def has_non_finite_float(data):
+    """Whether data contains NaN or infinite numbers, which orjson renders as null"""
+    kind = type(data)
+    if kind is float:
+        return not math.isfinite(data)
+    if kind is str or kind is int or kind is bool or data is None:
+        return False
+    if isinstance(data, dict):
+        return any(map(has_non_finite_float, data.values()))
+    if isinstance(data, (list, tuple)):
+        return any(map(has_non_finite_float, data))
+    if isinstance(data, Decimal):
+        return not data.is_finite()
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed, producing the
+    same bytes as the stdlib renderer. Falls back to the stdlib renderer when
+    orjson is missing, for indented or non-compact output, for data orjson
+    can't encode such as integers over 64 bits, and for floats orjson writes
+    differently: exponent notation, decimals below 1e-4, and NaN and
+    infinity, which the stdlib renderer rejects instead of writing null.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Only payloads with a null can hide a NaN, so most skip the walk
+        if (
+            has_exponent_float(ret)
+            or has_small_decimal_float(ret)
+            or (b"null" in ret and has_non_finite_float(data))
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape \u2028 and \u2029 like JSONRenderer, so the output stays a
+        # strict javascript subset. Both start with the same two bytes
+        if b"\xe2\x80" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
@@ -0,0 +1,128 @@
+import unicodedata
+
+from django.db import connections
+from django.db.models import Case, F, FloatField, Func, Q, TextField, Value, When
+from django.db.models.functions import Cast, Greatest
+
+# Arabic diacritics (tashkeel), Quranic marks and the tatweel stretching
+# character, none of which change the meaning of a shop or product name
+ARABIC_DECORATIONS = "".join(
+    chr(code)
+    for start, end in [(0x610, 0x61A), (0x640, 0x640), (0x64B, 0x65F), (0x670, 0x670)]
+    + [(0x6D6, 0x6ED)]
+    for code in range(start, end + 1)
+)
+
+TATWEEL = "\u0640"
+
+# Arabic letter variants people type interchangeably: hamza forms of alef,
+# alef maqsura for yeh and teh marbuta for heh
+ARABIC_LETTER_FOLDS = {"أ": "ا", "إ": "ا", "آ": "ا", "ى": "ي", "ة": "ه"}
+
+SEARCH_FOLD_TABLE = str.maketrans(
+    {**ARABIC_LETTER_FOLDS, **dict.fromkeys(ARABIC_DECORATIONS)}
+)
+
+# Ordering of searched querysets, usable as a keyset pagination ordering
+SEARCH_ORDERING = ("-search_rank", "name", "id")
+
+
+def normalize_search_term(term):
+    """
+    Normalize a search term: fold Arabic presentation forms and letter
+    variants, strip Arabic diacritics and tatweel, and collapse whitespace
+    """
+    term = unicodedata.normalize("NFKC", term)
+    term = term.translate(SEARCH_FOLD_TABLE)
+    return " ".join(term.split())
+
+
+class SearchFold(Func):
+    """
+    Database side of normalize_search_term() for a column: folds the Arabic
+    letter variants and strips diacritics and tatweel. On PostgreSQL this is
+    TRANSLATE(), which the pg_trgm indexes are built on
+    """
+
+    output_field = TextField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # Databases without TRANSLATE() get nested REPLACE() calls, which
+        # only cover the letter variants and tatweel to keep the SQL small
+        sql, params = compiler.compile(self.source_expressions[0])
+        for char, folded in [*ARABIC_LETTER_FOLDS.items(), (TATWEEL, "")]:
+            sql = f"REPLACE({sql}, '{char}', '{folded}')"
+        return sql, params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        # Characters without a counterpart in the second string are removed
+        source = "".join(ARABIC_LETTER_FOLDS) + ARABIC_DECORATIONS
+        target = "".join(ARABIC_LETTER_FOLDS.values())
+        return f"TRANSLATE({sql}, '{source}', '{target}')", params
+
+
+def get_folded_name(field):
+    """Name of the alias search_queryset() gives the folded field"""
+    return f"{field}_folded"
+
+
+def get_trigram_rank(term, fields):
+    """Trigram similarity to the first field, other fields weigh half"""
+    # Only importable with a PostgreSQL driver installed
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    # TrigramSimilarity is a real, cast it to double precision so the rank
+    # round-trips through keyset cursors without losing precision
+    similarities = [
+        Cast(TrigramSimilarity(get_folded_name(field), term), FloatField())
+        for field in fields
+    ]
+    if len(similarities) == 1:
+        return similarities[0]
+    return Greatest(
+        similarities[0],
+        *[similarity * 0.5 for similarity in similarities[1:]],
+        output_field=FloatField(),
+    )
+
+
+def get_like_rank(term, fields):
+    """Rank exact, prefix and substring matches of the first field higher"""
+    primary = get_folded_name(fields[0])
+    return Case(
+        When(**{f"{primary}__iexact": term}, then=Value(1.0)),
+        When(**{f"{primary}__istartswith": term}, then=Value(0.75)),
+        When(**{f"{primary}__icontains": term}, then=Value(0.5)),
+        default=Value(0.25),
+        output_field=FloatField(),
+    )
+
+
+def search_queryset(queryset, term, fields):
+    """
+    Filter queryset to rows where any of fields contains term, annotated with
+    a search_rank between 0 and 1. The first field is the main one. Fields
+    are compared through SearchFold, like the term.
+
+    On PostgreSQL the substring match is served by the pg_trgm GIN indexes
+    and rows are ranked by trigram similarity; other databases fall back to
+    LIKE with a simple exact/prefix/substring rank.
+    """
+    term = normalize_search_term(term)
+    if not term:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    queryset = queryset.alias(
+        **{get_folded_name(field): SearchFold(F(field)) for field in fields}
+    )
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f"{get_folded_name(field)}__icontains": term})
+
+    if connections[queryset.db].vendor == "postgresql":
+        rank = get_trigram_rank(term, fields)
+    else:
+        rank = get_like_rank(term, fields)
+
+    return queryset.filter(condition).annotate(search_rank=rank)
@@ -1,27 +1,27 @@
 from rest_framework import serializers
 from base.models import Shop, Product
+from base.sparse_fieldsets import SparseFieldsetsMixin
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = ["id", "name", "price", "description", "image", "category"]
 
 
-class ShopSerializer(serializers.ModelSerializer):
+class ShopSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Shop
         fields = ["id", "name", "address", "description", "menu_image", "category"]
 
 
-class ShopDetailSerializer(serializers.ModelSerializer):
+class ShopDetailSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     products = ProductSerializer(many=True, read_only=True)
     product_categories = serializers.SerializerMethodField()
 
     def get_product_categories(self, shop):
-        # Get distinct categories from products in this shop
-        categories = shop.products.exclude(category__isnull=True).exclude(category__exact="").values_list("category", flat=True).distinct()
-        return list(categories)
+        # Read the shop's categories from the category registry
+        return [category.name for category in shop.product_categories.all()]
 
     class Meta:
         model = Shop
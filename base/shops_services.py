@@ -0,0 +1,72 @@
+from django.db import transaction
+
+from base.catalog_cache import bump_product_categories_version
+from base.models import Product, ProductCategory
+
+
+def sync_product_categories(shop_id):
+    """
+    Make the shop's ProductCategory rows match the categories its products
+    use. Reads the categories through the (shop, category) index.
+    """
+    in_use = set(
+        Product.objects.filter(shop_id=shop_id)
+        .exclude(category__isnull=True)
+        .exclude(category__exact="")
+        .values_list("category", flat=True)
+        .distinct()
+    )
+    registered = set(
+        ProductCategory.objects.filter(shop_id=shop_id).values_list("name", flat=True)
+    )
+
+    if registered - in_use:
+        ProductCategory.objects.filter(
+            shop_id=shop_id, name__in=registered - in_use
+        ).delete()
+    if in_use - registered:
+        # A concurrent sync may have added some of them already
+        ProductCategory.objects.bulk_create(
+            [
+                ProductCategory(shop_id=shop_id, name=name)
+                for name in in_use - registered
+            ],
+            ignore_conflicts=True,
+        )
+    if in_use != registered:
+        transaction.on_commit(bump_product_categories_version)
+
+
+class ProductCategorySyncBatch:
+    """Shops whose categories are synced once the current transaction commits"""
+
+    def __init__(self):
+        self.shop_ids = set()
+
+    def is_pending(self, connection):
+        """Whether the batch is still registered to run on commit"""
+        return any(func is self for _, func, _ in connection.run_on_commit)
+
+    def __call__(self):
+        for shop_id in self.shop_ids:
+            sync_product_categories(shop_id)
+
+
+def sync_product_categories_on_commit(shop_id):
+    """
+    Sync the shop's categories after the current transaction commits, once
+    per shop however many of its products the transaction writes. Outside a
+    transaction the shop is synced right away.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        sync_product_categories(shop_id)
+        return
+
+    # A rollback drops the batch from run_on_commit, then a new one is needed
+    batch = getattr(connection, "product_category_sync_batch", None)
+    if batch is None or not batch.is_pending(connection):
+        batch = ProductCategorySyncBatch()
+        connection.product_category_sync_batch = batch
+        transaction.on_commit(batch)
+    batch.shop_ids.add(shop_id)
@@ -3,21 +3,34 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
 
+from base.catalog_cache import (
+    CATALOG_VERSION_KEY,
+    CatalogCacheMixin,
+    get_product_categories,
+    get_shop_version_key,
+)
 from base.models import Shop, Product
 from base.shops_serializer import ShopSerializer, ShopDetailSerializer, ProductSerializer
+from base.pagination import InvalidCursorError, KeysetPagination
+from base.reference_data import serve_reference_data
+from base.search import SEARCH_ORDERING, search_queryset
 
 # List all shops with optional filtering by category and search
-class ShopListView(generics.ListAPIView):
+class ShopListView(CatalogCacheMixin, generics.ListAPIView):
     """
-    List all shops with optional filtering by category and search
+    List all shops with optional filtering by category and search. Send a
+    cursor or limit query param to get keyset-paginated results. Responses
+    are cached until a shop changes
     """
 
     queryset = Shop.objects.all()
     serializer_class = ShopSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_catalog_version_key(self):
+        return CATALOG_VERSION_KEY
+
     # Get filtered queryset for shops
     def get_queryset(self):
         queryset = Shop.objects.all()
@@ -27,33 +40,53 @@ class ShopListView(generics.ListAPIView):
         if category:
             queryset = queryset.filter(category=category)
 
-        # Search by name or description
+        # Search by name or description, most relevant first
         search = self.request.query_params.get("search", None)
         if search:
-            queryset = queryset.filter(Q(name__icontains=search) | Q(description__icontains=search))
+            queryset = search_queryset(queryset, search, ["name", "description"])
+
+        return queryset.order_by(*self.get_ordering())
 
-        return queryset.order_by("name")
+    # Ordering of the list, also used as the keyset pagination ordering
+    def get_ordering(self):
+        if self.request.query_params.get("search"):
+            return SEARCH_ORDERING
+        return ("name", "id")
 
     # Return list of shops with success/error response
     def list(self, request, *args, **kwargs):
         try:
             queryset = self.get_queryset()
+
+            # Keyset pagination when the client sends a cursor or limit
+            paginator = KeysetPagination(ordering=self.get_ordering())
+            if paginator.is_requested(request):
+                page = paginator.paginate_queryset(queryset, request)
+                serializer = self.get_serializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data)
+
             serializer = self.get_serializer(queryset, many=True)
             return Response({"success": True, "count": queryset.count(), "data": serializer.data}, status=status.HTTP_200_OK)
+        except InvalidCursorError as e:
+            return Response({"success": False, "error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"success": False, "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 # Retrieve a shop with its products
-class ShopDetailView(generics.RetrieveAPIView):
+class ShopDetailView(CatalogCacheMixin, generics.RetrieveAPIView):
     """
-    Retrieve a shop with its products
+    Retrieve a shop with its products. Responses are cached until the shop or
+    one of its products changes
     """
 
     queryset = Shop.objects.all()
     serializer_class = ShopDetailSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_catalog_version_key(self):
+        return get_shop_version_key(self.kwargs.get("pk"))
+
     # Retrieve a single shop by pk with error handling
     def retrieve(self, request, *args, **kwargs):
         try:
@@ -69,14 +102,19 @@ class ShopDetailView(generics.RetrieveAPIView):
 
 
 # List all products for a shop or create a new product
-class ProductListView(generics.ListCreateAPIView):
+class ProductListView(CatalogCacheMixin, generics.ListCreateAPIView):
     """
-    List all products for a shop or create a new product
+    List all products for a shop or create a new product. Send a cursor or
+    limit query param to get keyset-paginated results. Product lists are
+    cached until the shop or one of its products changes
     """
 
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_catalog_version_key(self):
+        return get_shop_version_key(self.kwargs.get("shop_id"))
+
     # Get filtered queryset for products of a shop
     def get_queryset(self):
         shop_id = self.kwargs.get("shop_id")
@@ -87,12 +125,18 @@ class ProductListView(generics.ListCreateAPIView):
         if category:
             queryset = queryset.filter(category__icontains=category)
 
-        # Search products by name
+        # Search products by name and category, most relevant first
         search = self.request.query_params.get("search", None)
         if search:
-            queryset = queryset.filter(name__icontains=search)
+            queryset = search_queryset(queryset, search, ["name", "category"])
+
+        return queryset.order_by(*self.get_ordering())
 
-        return queryset.order_by("name")
+    # Ordering of the list, also used as the keyset pagination ordering
+    def get_ordering(self):
+        if self.request.query_params.get("search"):
+            return SEARCH_ORDERING
+        return ("name", "id")
 
     # Return list of products for a shop with success/error response
     def list(self, request, *args, **kwargs):
@@ -102,8 +146,18 @@ class ProductListView(generics.ListCreateAPIView):
             get_object_or_404(Shop, pk=shop_id)
 
             queryset = self.get_queryset()
+
+            # Keyset pagination when the client sends a cursor or limit
+            paginator = KeysetPagination(ordering=self.get_ordering())
+            if paginator.is_requested(request):
+                page = paginator.paginate_queryset(queryset, request)
+                serializer = self.get_serializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data, shop_id=shop_id)
+
             serializer = self.get_serializer(queryset, many=True)
             return Response({"success": True, "shop_id": shop_id, "count": queryset.count(), "data": serializer.data}, status=status.HTTP_200_OK)
+        except InvalidCursorError as e:
+            return Response({"success": False, "error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Shop.DoesNotExist:
             return Response({"success": False, "error": "Shop not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
@@ -190,11 +244,10 @@ def product_categories(request):
     Get all distinct product categories currently in use
     """
     try:
-        # Get distinct categories that are not null or empty
-        categories = Product.objects.filter(category__isnull=False).exclude(category__exact="").values_list("category", flat=True).distinct()
+        # Served from the cached list of the category registry
+        categories = get_product_categories()
 
-        categories_list = [cat for cat in categories if cat]
-        return Response({"success": True, "data": categories_list}, status=status.HTTP_200_OK)
+        return Response({"success": True, "data": categories}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({"success": False, "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -204,24 +257,9 @@ def product_categories(request):
 @permission_classes([IsAuthenticated])
 def shop_categories(request):
     """
-    Get all available shop categories
+    Get all available shop categories, served pre-encoded
     """
-    try:
-
-        categories = [{"value": choice[0], "label": choice[1]} for choice in ShopCategoryEnum.choices]
-        return Response({"success": True, "data": categories}, status=status.HTTP_200_OK)
-    except Exception as e:
-        return Response({"success": False, "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    """
-    Get all available shop categories
-    """
-    try:
-        from base.enums import ShopCategoryEnum
-
-        categories = [{"value": choice[0], "label": choice[1]} for choice in ShopCategoryEnum.choices]
-        return Response({"success": True, "data": categories}, status=status.HTTP_200_OK)
-    except Exception as e:
-        return Response({"success": False, "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return serve_reference_data(request, "shop_categories")
 
 
 @api_view(["POST"])
@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User as AuthUser
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from base.authentication import get_user_active_cache_key
+from base.catalog_cache import bump_shop_version
+from base.models import Product, Shop
+from base.shops_services import sync_product_categories_on_commit
+
+
+@receiver([post_save, post_delete], sender=Shop)
+def invalidate_shop_cache(sender, instance, **kwargs):
+    """Invalidate the cached catalog of a shop and the shop lists"""
+    # Deleting clears instance.pk, so read it before the commit
+    shop_id = instance.pk
+    # Bump after commit so readers can't re-cache the old rows under the new version
+    transaction.on_commit(lambda: bump_shop_version(shop_id, shop_list=True))
+
+
+# update_fields that can change the category registry of a product's shop
+PRODUCT_CATEGORY_FIELDS = {"shop", "shop_id", "category"}
+
+
+@receiver(post_save, sender=Product)
+def invalidate_saved_product_cache(sender, instance, created, update_fields, **kwargs):
+    """
+    Invalidate the cached catalog of the product's shop, and update its
+    category registry if the product's shop or category changed
+    """
+    shop_id = instance.shop_id
+
+    if update_fields is None or PRODUCT_CATEGORY_FIELDS & set(update_fields):
+        loaded = getattr(instance, "loaded_category", None)
+        instance.loaded_category = (shop_id, instance.category)
+
+        if created:
+            if instance.category:
+                sync_product_categories_on_commit(shop_id)
+        elif loaded != instance.loaded_category:
+            sync_product_categories_on_commit(shop_id)
+            if loaded is not None and loaded[0] != shop_id:
+                # Moving shops may leave a category of the old shop unused
+                sync_product_categories_on_commit(loaded[0])
+
+    transaction.on_commit(lambda: bump_shop_version(shop_id))
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_deleted_product_cache(sender, instance, **kwargs):
+    """
+    Invalidate the cached catalog of the product's shop, and update its
+    category registry if the product had a category
+    """
+    shop_id = instance.shop_id
+    if instance.category:
+        sync_product_categories_on_commit(shop_id)
+    transaction.on_commit(lambda: bump_shop_version(shop_id))
+
+
+@receiver([post_save, post_delete], sender=AuthUser)
+def invalidate_user_active_cache(sender, instance, **kwargs):
+    """
+    Forget the cached active check of an auth user, so deactivating or
+    deleting them revokes their tokens right away
+    """
+    cache_key = get_user_active_cache_key(instance.pk)
+    transaction.on_commit(lambda: cache.delete(cache_key))
@@ -0,0 +1,86 @@
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_QUERY_PARAM = "fields"
+EXCLUDE_QUERY_PARAM = "exclude"
+
+
+def parse_field_names(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def get_sparse_fieldset(request, field_names):
+    """
+    The names in field_names the request selected with the comma separated
+    ?fields= and ?exclude= query params. Unknown names are ignored, and
+    write requests always get every field.
+    """
+    selected = set(field_names)
+    if request is None or request.method not in SAFE_METHODS:
+        return selected
+
+    params = getattr(request, "query_params", request.GET)
+    if params.get(FIELDS_QUERY_PARAM):
+        selected &= parse_field_names(params[FIELDS_QUERY_PARAM])
+    if params.get(EXCLUDE_QUERY_PARAM):
+        selected -= parse_field_names(params[EXCLUDE_QUERY_PARAM])
+    return selected
+
+
+class SparseFieldsetsMixin:
+    """
+    Lets clients pick the top-level fields of a response with ?fields=a,b or
+    drop some with ?exclude=a,b. Fields that aren't selected are removed
+    before serializing, so their method fields and nested serializers never
+    run. Only add it to serializers views return at the top level.
+
+    sparse_select_related and sparse_prefetch_related map field names to the
+    related lookups they need, so shrink_queryset() only joins and prefetches
+    what the selected fields use.
+    """
+
+    sparse_select_related = {}
+    sparse_prefetch_related = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get("request")
+        if request is None:
+            return
+
+        selected = get_sparse_fieldset(request, self.fields)
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+    @classmethod
+    def get_selected_fields(cls, request):
+        """
+        The fields the request selected, for views to shrink their querysets
+        before a serializer is created
+        """
+        return get_sparse_fieldset(request, cls.Meta.fields)
+
+    @classmethod
+    def shrink_queryset(cls, queryset, request):
+        """Join and prefetch only the relations the selected fields need"""
+        fields = cls.get_selected_fields(request)
+
+        select_related = []
+        prefetch_related = []
+        for name in cls.Meta.fields:
+            if name not in fields:
+                continue
+            relation = cls.sparse_select_related.get(name)
+            if relation and relation not in select_related:
+                select_related.append(relation)
+            for lookup in cls.sparse_prefetch_related.get(name, []):
+                if lookup not in prefetch_related:
+                    prefetch_related.append(lookup)
+
+        # select_related() without arguments would join every relation
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
@@ -4,7 +4,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
-from base import users_views, shops_views, orders_views
+from base import users_views, shops_views, orders_views, reference_data
 
 urlpatterns = [
     # Health check
@@ -37,7 +37,11 @@ urlpatterns = [
     path("shops/", shops_views.ShopListView.as_view(), name="shop_list"),
     path("shops/categories/", shops_views.shop_categories, name="shop_categories"),
     path("shops/<int:pk>/", shops_views.ShopDetailView.as_view(), name="shop_detail"),
-    path("shops/create-by-name/", shops_views.create_shop_by_name, name="create_shop_by_name"),
+    path(
+        "shops/create-by-name/",
+        shops_views.create_shop_by_name,
+        name="create_shop_by_name",
+    ),
     # Product endpoints
     path(
         "products/categories/",
@@ -81,6 +85,11 @@ urlpatterns = [
         orders_views.RemoveItemsFromOrderView.as_view(),
         name="remove_items_from_order",
     ),
+    path(
+        "orders/<int:pk>/items/batch/",
+        orders_views.BatchUpdateItemsView.as_view(),
+        name="batch_update_items",
+    ),
     path(
         "orders/items/<int:item_id>/update-quantity/",
         orders_views.UpdateItemQuantityView.as_view(),
@@ -107,4 +116,18 @@ urlpatterns = [
         name="complete_order",
     ),
     path("orders/statuses/", orders_views.order_statuses, name="order_statuses"),
+    path(
+        "orders/changes/", orders_views.OrderChangesView.as_view(), name="order_changes"
+    ),
+    path(
+        "orders/export/csv/",
+        orders_views.OrderExportView.as_view(export_format="csv"),
+        name="export_orders_csv",
+    ),
+    path(
+        "orders/export/jsonl/",
+        orders_views.OrderExportView.as_view(export_format="jsonl"),
+        name="export_orders_jsonl",
+    ),
+    path("reference-data/", reference_data.reference_data, name="reference_data"),
 ]
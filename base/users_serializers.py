@@ -4,6 +4,7 @@ from django.contrib.auth.models import User as AuthUser
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 from base.models import User
+from base.sparse_fieldsets import SparseFieldsetsMixin
 
 ACCEPTED_PAYMENT_TYPES_HELP_TEXT = "List of accepted payment methods"
 
@@ -147,7 +148,7 @@ class UserLoginSerializer(serializers.Serializer):
         else:
             raise serializers.ValidationError("Must include 'phone_number' and 'password'.")
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     username = serializers.CharField(source="auth_user.username", read_only=True)
     username = serializers.CharField(source="auth_user.username", read_only=True)
     email = serializers.CharField(source="auth_user.email", read_only=True)
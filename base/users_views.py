@@ -14,7 +14,10 @@ from base.users_serializers import (
     ChangePasswordSerializer,
     UpdateProfileSerializer,
 )
+from base.authentication import get_token_for_user
 from base.models import User
+from base.reference_data import serve_reference_data
+from base.utils import get_user_from_user_auth
 from django.db import transaction
 
 
@@ -29,14 +32,14 @@ class RegisterView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        # Generate tokens
-        refresh = RefreshToken.for_user(user)
-        access_token = refresh.access_token
-
         # Get user profile data
         user_profile = User.objects.get(auth_user=user)
         user_data = UserSerializer(user_profile).data
 
+        # Generate tokens
+        refresh = get_token_for_user(user, user_profile)
+        access_token = refresh.access_token
+
         return Response(
             {
                 "message": "User registered successfully",
@@ -59,8 +62,8 @@ class LoginView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
 
         user = serializer.validated_data["user"]
-        refresh = RefreshToken.for_user(user)
-        access_token = refresh.access_token  # Get user profile data
+
+        # Get user profile data
         try:
             user_profile = User.objects.get(auth_user=user)
             user_data = UserSerializer(user_profile).data
@@ -71,6 +74,10 @@ class LoginView(generics.GenericAPIView):
             )
             user_data = UserSerializer(user_profile).data
 
+        # Generate tokens
+        refresh = get_token_for_user(user, user_profile)
+        access_token = refresh.access_token
+
         return Response(
             {
                 "message": "Login successful",
@@ -90,13 +97,15 @@ class ProfileView(generics.RetrieveAPIView):
 
     def get_object(self):
         try:
-            return User.objects.get(auth_user=self.request.user)
+            return get_user_from_user_auth(self.request)
         except User.DoesNotExist:
+            # The request user may be a token-backed user without a database row
+            auth_user = AuthUser.objects.get(pk=self.request.user.pk)
             # Create profile if it doesn't exist
             return User.objects.create(
-                auth_user=self.request.user,
-                username=self.request.user.username,
-                full_name=f"{self.request.user.first_name} {self.request.user.last_name}".strip() or self.request.user.username,
+                auth_user=auth_user,
+                username=auth_user.username,
+                full_name=f"{auth_user.first_name} {auth_user.last_name}".strip() or auth_user.username,
             )
 
 
@@ -106,13 +115,15 @@ class UpdateProfileView(generics.UpdateAPIView):
 
     def get_object(self):
         try:
-            return User.objects.get(auth_user=self.request.user)
+            return get_user_from_user_auth(self.request)
         except User.DoesNotExist:
+            # The request user may be a token-backed user without a database row
+            auth_user = AuthUser.objects.get(pk=self.request.user.pk)
             # Create profile if it doesn't exist
             return User.objects.create(
-                auth_user=self.request.user,
-                username=self.request.user.username,
-                full_name=f"{self.request.user.first_name} {self.request.user.last_name}".strip() or self.request.user.username,
+                auth_user=auth_user,
+                username=auth_user.username,
+                full_name=f"{auth_user.first_name} {auth_user.last_name}".strip() or auth_user.username,
             )
 
 
@@ -121,7 +132,8 @@ class ChangePasswordView(generics.UpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # The request user may be a token-backed user without a database row
+        return AuthUser.objects.get(pk=self.request.user.pk)
 
     def update(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -150,15 +162,9 @@ def logout_view(request):
 @permission_classes([IsAuthenticated])
 def get_payment_methods(request):
     """
-    Get all available payment methods
+    Get all available payment methods, served pre-encoded
     """
-    try:
-        from base.enums import UserAcceptedPaymentMethodsEnum
-
-        payment_methods = [{"value": choice[0], "label": choice[1]} for choice in UserAcceptedPaymentMethodsEnum.choices]
-        return Response({"success": True, "data": payment_methods}, status=status.HTTP_200_OK)
-    except Exception as e:
-        return Response({"success": False, "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return serve_reference_data(request, "payment_methods")
 
 
 @api_view(["GET"])
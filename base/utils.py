@@ -2,26 +2,103 @@ import random
 import string
 import re
 
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import IntegrityError, transaction
 from django.http import HttpRequest
+from django.utils.crypto import salted_hmac
 from django.contrib.auth.models import User as AuthUser
 from rest_framework import serializers
 
-from base.models import User
+from base.models import GroupOrder, User
 
 
 def get_user_from_user_auth(request: HttpRequest):
+    """
+    Get the custom User of the authenticated user. The result is stored on the
+    underlying HttpRequest, so a request does at most one profile lookup no
+    matter how many views and serializers ask for it
+    """
+    # DRF wraps the HttpRequest, keep the cache on the shared inner request
+    http_request = getattr(request, "_request", request)
     auth_user = request.user
-    return User.objects.get(auth_user=auth_user)
 
+    cached = getattr(http_request, "_custom_user_cache", None)
+    if cached is not None and cached[0] == auth_user.pk:
+        return cached[1]
 
-def generate_unique_order_code():
-    """Generate a unique 6-digit alphanumeric code for orders"""
-    from base.models import GroupOrder
+    user = None
+    profile_id = getattr(auth_user, "profile_id", None)
+    if profile_id is not None:
+        # Stateless JWT users carry the custom User id in their token
+        user = User.objects.filter(pk=profile_id).first()
+    if user is None:
+        # The profile may have been recreated since the token was issued
+        user = User.objects.get(auth_user_id=auth_user.pk)
+    http_request._custom_user_cache = (auth_user.pk, user)
+    return user
 
-    while True:
-        # Generate a 6-digit code using numbers and uppercase letters
-        code = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
 
-        # Check if this code already exists
-        if not GroupOrder.objects.filter(code=code).exists():
+def has_shared_cache():
+    """
+    Whether the default cache is shared by every worker process. A per-process
+    LocMemCache can't be invalidated from the process handling a write
+    """
+    return not isinstance(caches["default"], LocMemCache)
+
+
+ORDER_CODE_ALPHABET = string.ascii_uppercase + string.digits
+ORDER_CODE_LENGTH = 6
+ORDER_CODE_SPACE = len(ORDER_CODE_ALPHABET) ** ORDER_CODE_LENGTH
+ORDER_CODE_MAX_ATTEMPTS = 10
+
+
+def _permute_order_code_value(value):
+    """Keyed pseudo-random permutation of the 32-bit integers (Feistel network)"""
+    left, right = value >> 16, value & 0xFFFF
+    for round_index in range(4):
+        digest = salted_hmac(
+            "base.utils.order_code", f"{round_index}:{right}", algorithm="sha256"
+        ).digest()
+        left, right = right, left ^ int.from_bytes(digest[:2], "big")
+    return (left << 16) | right
+
+
+def order_code_for_id(order_id):
+    """
+    Map an order id to a 6 character alphanumeric code. Different ids below
+    ORDER_CODE_SPACE always get different codes, and consecutive ids don't
+    produce guessable codes since the permutation is keyed by SECRET_KEY.
+    """
+    value = _permute_order_code_value(order_id % ORDER_CODE_SPACE)
+    # Cycle-walk until the value falls back inside the code space
+    while value >= ORDER_CODE_SPACE:
+        value = _permute_order_code_value(value)
+
+    code = []
+    for _ in range(ORDER_CODE_LENGTH):
+        value, index = divmod(value, len(ORDER_CODE_ALPHABET))
+        code.append(ORDER_CODE_ALPHABET[index])
+    return "".join(reversed(code))
+
+
+def allocate_order_code(order):
+    """
+    Assign a unique code to a newly created order without any pre-check query.
+    The code is derived from the order id, so new orders never collide with
+    each other; random codes are only tried if an older order already holds
+    the derived code. Must be called inside a transaction.
+    """
+    code = order_code_for_id(order.pk)
+    for _ in range(ORDER_CODE_MAX_ATTEMPTS):
+        try:
+            # Savepoint, so a unique violation doesn't abort the outer transaction
+            with transaction.atomic():
+                GroupOrder.objects.filter(pk=order.pk).update(code=code)
+        except IntegrityError:
+            code = "".join(random.choices(ORDER_CODE_ALPHABET, k=ORDER_CODE_LENGTH))
+        else:
+            order.code = code
             return code
+
+    raise IntegrityError("Could not allocate a unique order code")
@@ -174,14 +174,18 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("base.authentication.ProfileJWTAuthentication",),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # orjson-backed JSON, same output as DRF's stdlib JSONRenderer/JSONParser
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "base.renderers.FastJSONRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "base.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
@@ -212,8 +216,48 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=60),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
+    "TOKEN_OBTAIN_SERIALIZER": "base.authentication.ProfileTokenObtainPairSerializer",
 }
 
+# Seconds to cache the "auth user is still active" check for stateless JWT
+# authentication, the longest a deactivated or deleted user keeps access.
+# Without a shared cache (REDIS_URL) the check queries on every request.
+# 0 trusts the token claims without querying the database
+JWT_REVOCATION_CHECK_TTL = config("JWT_REVOCATION_CHECK_TTL", default=60, cast=int)
+
+# How long responses stored for Idempotency-Key retries are kept
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# How long an Idempotency-Key may stay pending before it is considered
+# abandoned by a dead worker and can be claimed again
+IDEMPOTENCY_KEY_PENDING_TIMEOUT = timedelta(seconds=60)
+
+# How far orders/changes/ sync tokens lag behind now, longer than any write
+# transaction takes to commit
+ORDER_CHANGES_LAG = timedelta(seconds=5)
+
+# Cache configuration. Use Redis when REDIS_URL is set so every worker shares
+# the cache, otherwise fall back to a per-process in-memory cache
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds to keep cached shop catalog responses. Entries are invalidated by
+# version bumps on Shop/Product changes. Catalog responses are only cached
+# with a shared cache (REDIS_URL), other workers would miss the bumps
+CATALOG_CACHE_TIMEOUT = config("CATALOG_CACHE_TIMEOUT", default=3600, cast=int)
+
 # CORS settings (for frontend integration)
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",